@@ -1,42 +1,280 @@
+import logging
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash
-from werkzeug.utils import secure_filename
+import uuid
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort, Response, session
+from werkzeug.exceptions import RequestEntityTooLarge
 from dotenv import load_dotenv
-from utils.pdf_parser import extract_text_from_pdf
-from utils.keyword_matcher import compare_keywords
-from utils.openai_api import get_resume_feedback
+from utils.pdf_parser import extract_pdf, is_pdf_bytes
+from utils.keyword_matcher import compare_keywords, extract_keywords, get_keyword_frequency
+from utils.resume_cache import ResumeCache, content_key
+from utils.resume_document import parse_resume
+from utils.openai_api import (get_resume_feedback, configure_feedback_cache, configure_llm_client,
+                              configure_prompt_builder, configure_feedback_backends)
+from utils.jobs import create_job_queue
+from utils.batch_matcher import batch_compare
+from utils.corpus_index import JobCorpusIndex
+from utils.skill_matcher import load_skill_matcher
+from utils.analysis_session import AnalysisSessionStore
+from utils.metrics import timed, render_metrics, EXTRACTION_BACKEND
 
 # Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
-UPLOAD_FOLDER = 'uploads'
+# LOG_LEVEL=DEBUG adds per-request sizes and timings; resume and job
+# description contents are never logged.
+logging.basicConfig(
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    format='%(asctime)s %(levelname)s %(name)s: %(message)s',
+)
+logger = logging.getLogger(__name__)
+
 ALLOWED_EXTENSIONS = {'pdf'}
 
+TIMED_OUT_MESSAGE = 'Reading your PDF took too long. Please try again, or paste your resume text instead'
+
+# Uploads are parsed straight from memory (werkzeug spools large bodies to
+# an anonymous temp file that is removed with the request). Anything over
+# this size is rejected before the body is read.
+MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 5 * 1024 * 1024))
+
 app = Flask(__name__)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+# Leave headroom for the text fields that share the request body
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES + 1024 * 1024
 app.secret_key = 'supersecretkey' 
 
-# Ensure upload folder exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# Cache of extracted resume text keyed on upload contents. Set
+# RESUME_CACHE_DB to share a SQLite tier across gunicorn workers.
+resume_cache = ResumeCache(
+    db_path=os.getenv('RESUME_CACHE_DB'),
+    max_memory_bytes=int(os.getenv('RESUME_CACHE_MEMORY_BYTES', 32 * 1024 * 1024)),
+    max_disk_bytes=int(os.getenv('RESUME_CACHE_DISK_BYTES', 512 * 1024 * 1024)),
+)
+
+# Cache of parsed AI feedback. Set FEEDBACK_CACHE_DB to persist it across
+# restarts and share it between workers.
+configure_feedback_cache(
+    db_path=os.getenv('FEEDBACK_CACHE_DB'),
+    ttl_seconds=int(os.getenv('FEEDBACK_CACHE_TTL', 7 * 24 * 3600)),
+    max_entries=int(os.getenv('FEEDBACK_CACHE_MAX_ENTRIES', 10000)),
+)
+
+# One pooled OpenAI client per worker. At most LLM_MAX_CONCURRENCY calls run
+# at once; a request that finds every slot busy for LLM_ACQUIRE_TIMEOUT
+# seconds gets keyword-only results instead of waiting on the rate limit.
+configure_llm_client(
+    timeout=float(os.getenv('LLM_TIMEOUT', 60)),
+    connect_timeout=float(os.getenv('LLM_CONNECT_TIMEOUT', 5)),
+    max_retries=int(os.getenv('LLM_MAX_RETRIES', 3)),
+    max_concurrency=int(os.getenv('LLM_MAX_CONCURRENCY', 8)),
+    acquire_timeout=float(os.getenv('LLM_ACQUIRE_TIMEOUT', 0)),
+)
+
+# Token budgets for the prompt. Over-budget resumes keep the sections most
+# relevant to the job's keywords instead of being cut at a fixed length.
+configure_prompt_builder(
+    resume_tokens=int(os.getenv('PROMPT_RESUME_TOKENS', 900)),
+    job_tokens=int(os.getenv('PROMPT_JOB_TOKENS', 600)),
+)
+
+# Feedback backends: 'openai' (prompted JSON), 'openai_schema' (structured
+# outputs, needs a model that supports them) or 'rules' (local, built from
+# the keyword comparison). The fallback answers when the primary is
+# saturated, failing, slower than FEEDBACK_LATENCY_BUDGET seconds or has
+# FEEDBACK_MAX_QUEUE_DEPTH calls in flight. FEEDBACK_FALLBACK=none shows
+# keyword results only in those cases.
+FEEDBACK_FALLBACK = os.getenv('FEEDBACK_FALLBACK', 'rules')
+configure_feedback_backends(
+    primary=os.getenv('FEEDBACK_BACKEND', 'openai'),
+    fallback=None if FEEDBACK_FALLBACK == 'none' else FEEDBACK_FALLBACK,
+    model=os.getenv('FEEDBACK_MODEL'),
+    latency_budget=float(os.getenv('FEEDBACK_LATENCY_BUDGET', 0)),
+    max_queue_depth=int(os.getenv('FEEDBACK_MAX_QUEUE_DEPTH', 0)),
+)
+
+# IDF statistics over every job description submitted so far. When
+# JOB_CORPUS_DB is set, keyword scores weight rare terms above common ones.
+JOB_CORPUS_DB = os.getenv('JOB_CORPUS_DB')
+corpus_index = JobCorpusIndex(JOB_CORPUS_DB) if JOB_CORPUS_DB else None
+KEYWORD_SCORING = os.getenv('KEYWORD_SCORING', 'bm25' if corpus_index else 'overlap')
+
+# Multi-word skill matcher. The compiled automaton is written to
+# SKILL_AUTOMATON_PATH on first start (or ahead of time with
+# `python -m utils.skill_matcher skills.automaton`) and memory-mapped from
+# there, so every worker shares one copy of it.
+skill_matcher = load_skill_matcher(os.getenv('SKILL_AUTOMATON_PATH', 'skills.automaton'))
+
+# Per-browser analysis sessions. A resubmission with a lightly edited resume
+# or job description only re-tokenizes the changed lines, and reuses the
+# previous AI feedback while the keyword counts moved by at most
+# FEEDBACK_REUSE_DRIFT (a fraction; 0 always asks the model again).
+# ANALYSIS_SESSIONS=0 analyzes every submission from scratch.
+FEEDBACK_REUSE_DRIFT = float(os.getenv('FEEDBACK_REUSE_DRIFT', 0.05))
+analysis_sessions = AnalysisSessionStore(
+    max_sessions=int(os.getenv('ANALYSIS_SESSIONS', 1000)),
+    ttl_seconds=float(os.getenv('ANALYSIS_SESSION_TTL', 3600)),
+    scoring=KEYWORD_SCORING,
+    corpus_index=corpus_index,
+    skill_matcher=skill_matcher,
+)
+
+# Submit/poll mode: POST enqueues the analysis and returns a job id instead
+# of blocking the HTTP worker on PDF parsing and the OpenAI call.
+ASYNC_ANALYSIS = os.getenv('ASYNC_ANALYSIS', '0') == '1'
+job_queue = create_job_queue(
+    os.getenv('JOB_QUEUE_BACKEND', 'inprocess'),
+    max_workers=int(os.getenv('ANALYSIS_CONCURRENCY', 4)),
+)
+
+# /api/batch limits: documents per request (scoring is resumes x jobs) and
+# ranked pairs returned
+BATCH_MAX_DOCUMENTS = int(os.getenv('BATCH_MAX_DOCUMENTS', 500))
+BATCH_MAX_RESULTS = int(os.getenv('BATCH_MAX_RESULTS', 100))
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def read_pdf_upload(file):
+    """
+    Reads an uploaded PDF into memory, checking the magic bytes before
+    reading the rest and enforcing MAX_UPLOAD_BYTES.
+    Args:
+        file (FileStorage): Uploaded file.
+    Returns:
+        bytes: File contents, or None if the upload is not a PDF or too large.
+    """
+    with timed('upload'):
+        head = file.stream.read(1024)
+        if not is_pdf_bytes(head):
+            return None
+        rest = file.stream.read(MAX_UPLOAD_BYTES + 1 - len(head))
+    if len(head) + len(rest) > MAX_UPLOAD_BYTES:
+        return None
+    return head + rest
+
+class ExtractionTimedOut(Exception):
+    """
+    Raised when the PDF time budget ran out before any text was extracted.
+    """
+
+def load_resume_pdf(data):
+    """
+    Extracts and parses uploaded PDF bytes, using the resume cache when the
+    same file was seen before.
+    Args:
+        data (bytes): Uploaded file contents.
+    Returns:
+        ResumeDocument: Parsed resume, or None if no text could be extracted.
+    Raises:
+        ExtractionTimedOut: The time budget ran out before any text was read.
+    """
+    key = content_key(data)
+    cached = resume_cache.get(key)
+    if cached is not None:
+        return cached
+
+    with timed('extraction'):
+        result = extract_pdf(data)
+    EXTRACTION_BACKEND.inc(backend=result['backend'] or 'none')
+    logger.debug("PDF extracted with %s: %d characters, %s/%s pages, partial=%s",
+                 result['backend'], len(result['text']), result['pages_read'],
+                 result['total_pages'], result['partial'])
+    document = result['document']
+    if not document.text:
+        if result['partial']:
+            raise ExtractionTimedOut(TIMED_OUT_MESSAGE)
+        return None
+    with timed('tokenization'):
+        document.keyword_frequency()
+    # Text cut short by the time budget may be complete on a retry
+    if not result['partial']:
+        resume_cache.put(key, document)
+    return document
+
+def current_analysis():
+    """
+    Returns:
+        AnalysisSession: Session for the requesting browser, keyed by an id
+            kept in the signed session cookie.
+    """
+    if 'analysis_id' not in session:
+        session['analysis_id'] = uuid.uuid4().hex
+    return analysis_sessions.get(session['analysis_id'])
+
+def score_keywords(document, job_description, analysis=None):
+    """
+    Runs keyword comparison with the configured scoring mode, recording the
+    job description in the corpus index first when one is configured.
+    With an analysis session only the changes since its last submission
+    are re-tokenized.
+    """
+    if analysis is not None:
+        with timed('matching'):
+            return analysis.update(job_description=job_description, resume_document=document)
+    with timed('tokenization'):
+        job_freq = get_keyword_frequency(extract_keywords(job_description))
+    if corpus_index is not None:
+        corpus_index.add_document(job_description, job_freq)
+    with timed('matching'):
+        return compare_keywords(document.text, job_description,
+                                scoring=KEYWORD_SCORING, corpus_index=corpus_index,
+                                job_freq=job_freq, skill_matcher=skill_matcher,
+                                resume_document=document)
+
+def session_feedback(analysis, document, job_description, keyword_result, on_update=None):
+    """
+    AI feedback for the analysis session: the previous feedback when the
+    submission barely changed, otherwise a fresh get_resume_feedback() call.
+    """
+    feedback = analysis.reusable_feedback(FEEDBACK_REUSE_DRIFT) if analysis is not None else None
+    if feedback is not None:
+        feedback['reused'] = True
+        return feedback
+    feedback = get_resume_feedback(document.text, job_description, OPENAI_API_KEY, keyword_result,
+                                   on_update=on_update, document=document)
+    if analysis is not None:
+        analysis.remember_feedback(feedback)
+    return feedback
+
+def run_analysis(job, job_description, resume_text="", resume_pdf=None, analysis=None):
+    """
+    Background pipeline: extraction, keyword matching, then AI feedback.
+    Each stage publishes its result on the job as soon as it is ready.
+    """
+    if resume_pdf is not None:
+        document = load_resume_pdf(resume_pdf)
+        if document is None:
+            raise ValueError("No text could be extracted from the uploaded PDF")
+    else:
+        document = parse_resume(resume_text)
+
+    keyword_result = score_keywords(document, job_description, analysis)
+    job.update(keyword_result=keyword_result)
+    job.update(feedback=session_feedback(analysis, document, job_description, keyword_result,
+                                         on_update=lambda partial: job.update(feedback=partial)))
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
+        # Get job description
+        job_description = request.form.get('job_description', '')
+        if not job_description.strip():
+            flash('Please provide a job description')
+            return redirect(request.url)
+        
         # Get resume text from either PDF or text input
         resume_text = ""
+        resume_pdf = None
+        document = None
         
         # Check if PDF file was uploaded
         if 'resume' in request.files and request.files['resume'].filename != '':
             file = request.files['resume']
             if file and file.filename and allowed_file(file.filename):
-                filename = secure_filename(file.filename)
-                filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-                file.save(filepath)
-                resume_text = extract_text_from_pdf(filepath)
+                resume_pdf = read_pdf_upload(file)
+                if resume_pdf is None:
+                    flash(f'Please upload a valid PDF no larger than {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+                    return redirect(request.url)
             else:
                 flash('Allowed file type is PDF')
                 return redirect(request.url)
@@ -45,41 +283,86 @@ def index():
         elif 'resume_text' in request.form and request.form['resume_text'].strip():
             resume_text = request.form['resume_text'].strip()
         
+        if ASYNC_ANALYSIS and (resume_pdf is not None or resume_text):
+            job_id = job_queue.submit(run_analysis, job_description,
+                                      resume_text=resume_text, resume_pdf=resume_pdf,
+                                      analysis=current_analysis())
+            if request.accept_mimetypes.best == 'application/json':
+                return jsonify({'job_id': job_id, 'status_url': url_for('job_status', job_id=job_id)}), 202
+            return redirect(url_for('job_page', job_id=job_id))
+        
+        if resume_pdf is not None:
+            try:
+                document = load_resume_pdf(resume_pdf)
+            except ExtractionTimedOut as e:
+                flash(str(e))
+                return redirect(request.url)
+        elif resume_text:
+            document = parse_resume(resume_text)
+        
         # If neither PDF nor text provided
-        if not resume_text:
+        if document is None:
             flash('Please either upload a PDF or paste your resume text')
             return redirect(request.url)
         
-        # Get job description
-        job_description = request.form.get('job_description', '')
-        if not job_description.strip():
-            flash('Please provide a job description')
-            return redirect(request.url)
-        
-        print(f"=== RESUME TEXT DEBUG ===")
-        print(f"Resume text extracted: {len(resume_text) if resume_text else 0} characters")
-        print(f"Resume text preview: {resume_text[:300] if resume_text else 'EMPTY'}")
-        print(f"Job description: {job_description[:200] if job_description else 'EMPTY'}")
-        print(f"=== END DEBUG ===")
+        logger.debug("Analyzing resume (%d characters, %d sections) against job description (%d characters)",
+                     len(document.text), len(document.sections), len(job_description))
         
         # Compare keywords
-        keyword_result = compare_keywords(resume_text, job_description)
+        analysis = current_analysis()
+        keyword_result = score_keywords(document, job_description, analysis)
         
         # Get AI feedback
-        print(f"=== CALLING OPENAI API ===")
-        print(f"About to call get_resume_feedback with:")
-        print(f"  - Resume text length: {len(resume_text)}")
-        print(f"  - Job description length: {len(job_description)}")
-        print(f"  - API key present: {'Yes' if OPENAI_API_KEY else 'No'}")
-        
-        feedback = get_resume_feedback(resume_text, job_description, OPENAI_API_KEY)
+        feedback = session_feedback(analysis, document, job_description, keyword_result)
         
-        print(f"=== OPENAI API CALL COMPLETED ===")
-        print(f"Feedback received: {feedback}")
         return render_template('result.html',
                                keyword_result=keyword_result,
                                feedback=feedback)
     return render_template('index.html')
 
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(error):
+    flash(f'Uploads are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB')
+    return redirect(url_for('index'))
+
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/jobs/<job_id>')
+def job_page(job_id):
+    if job_queue.get(job_id) is None:
+        abort(404)
+    return render_template('job.html', job_id=job_id)
+
+@app.route('/api/jobs/<job_id>')
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job id'}), 404
+    return jsonify(job)
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """
+    Rank resumes against job descriptions by keyword match.
+    Expects JSON with "resumes" and "job_descriptions" lists of texts and an
+    optional "top_n" (at most BATCH_MAX_RESULTS, which is also the default).
+    """
+    payload = request.get_json(silent=True) or {}
+    resumes = payload.get('resumes')
+    job_descriptions = payload.get('job_descriptions')
+    if not isinstance(resumes, list) or not isinstance(job_descriptions, list) \
+            or not resumes or not job_descriptions:
+        return jsonify({'error': 'Provide non-empty "resumes" and "job_descriptions" lists'}), 400
+    if not all(isinstance(text, str) for text in resumes + job_descriptions):
+        return jsonify({'error': '"resumes" and "job_descriptions" must contain only strings'}), 400
+    if len(resumes) + len(job_descriptions) > BATCH_MAX_DOCUMENTS:
+        return jsonify({'error': f'At most {BATCH_MAX_DOCUMENTS} documents per request'}), 413
+    top_n = payload.get('top_n', BATCH_MAX_RESULTS)
+    if not isinstance(top_n, int) or isinstance(top_n, bool) or not 1 <= top_n <= BATCH_MAX_RESULTS:
+        return jsonify({'error': f'"top_n" must be an integer from 1 to {BATCH_MAX_RESULTS}'}), 400
+    return jsonify({'results': batch_compare(resumes, job_descriptions, top_n)})
+
 if __name__ == '__main__':
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Synthetic corpus for the benchmarks: resume PDFs with varying page counts
+and layouts, and job descriptions of varying length. PDFs are written by
+hand so generating the corpus needs no extra dependencies.
+"""
+import random
+
+SKILLS = [
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'C++', 'C#', 'Go', 'Rust', 'SQL',
+    'Django', 'Flask', 'FastAPI', 'React', 'Node.js', 'Angular', 'Vue.js', 'Spring Boot',
+    'AWS', 'Azure', 'Google Cloud Platform', 'Docker', 'Kubernetes', 'Terraform',
+    'CI/CD', 'GitHub Actions', 'Jenkins', 'PostgreSQL', 'MongoDB', 'Redis', 'Kafka',
+    'machine learning', 'deep learning', 'PyTorch', 'TensorFlow', 'pandas', 'NumPy',
+    'REST API', 'GraphQL', 'microservices', 'Linux', 'Agile', 'Scrum', 'Jira',
+]
+VERBS = [
+    'Built', 'Designed', 'Led', 'Implemented', 'Migrated', 'Optimized', 'Automated',
+    'Maintained', 'Shipped', 'Refactored', 'Scaled', 'Mentored', 'Owned', 'Launched',
+]
+NOUNS = [
+    'payment service', 'data pipeline', 'search backend', 'analytics dashboard',
+    'mobile API', 'recommendation engine', 'billing platform', 'internal tooling',
+    'deployment pipeline', 'reporting system', 'customer portal', 'ML training stack',
+]
+FILLER = (
+    'We are looking for a motivated engineer to join our growing team. You will work '
+    'closely with product managers and designers to deliver high quality features. '
+    'The ideal candidate is comfortable with ambiguity and enjoys solving hard problems. '
+).split()
+
+
+def _bullet(rng):
+    skills = rng.sample(SKILLS, 2)
+    return (f"{rng.choice(VERBS)} a {rng.choice(NOUNS)} using {skills[0]} and {skills[1]}, "
+            f"improving throughput by {rng.randint(10, 90)}%")
+
+
+def resume_lines(rng, pages):
+    """
+    Generate resume text lines for roughly the given number of pages.
+    """
+    lines = ['Jane Doe', 'Software Engineer', 'jane.doe@example.com', '', 'EXPERIENCE']
+    for job in range(pages * 3):
+        lines.append(f"Senior Engineer, Company {job} ({2010 + job % 12} - {2012 + job % 12})")
+        lines.extend(f"- {_bullet(rng)}" for _ in range(5))
+        lines.append('')
+    lines += ['EDUCATION', 'B.Sc. Computer Science, State University, 2010', '', 'SKILLS']
+    lines.append(', '.join(rng.sample(SKILLS, 15)))
+    return lines
+
+
+def job_description(rng, words):
+    """
+    Generate a job description of about the given number of words.
+    """
+    parts = ['Requirements:']
+    while sum(len(p.split()) for p in parts) < words:
+        if rng.random() < 0.4:
+            parts.append(f"Experience with {rng.choice(SKILLS)} and {rng.choice(SKILLS)}.")
+        else:
+            parts.append(' '.join(rng.choice(FILLER) for _ in range(12)) + '.')
+    return ' '.join(parts)
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def make_pdf(lines, layout='single', lines_per_page=45):
+    """
+    Write a minimal text PDF.
+    Args:
+        lines (list): Text lines.
+        layout (str): 'single' column or 'two' columns per page.
+        lines_per_page (int): Lines per column.
+    Returns:
+        bytes: PDF file contents.
+    """
+    columns = 2 if layout == 'two' else 1
+    per_page = lines_per_page * columns
+    pages = [lines[i:i + per_page] for i in range(0, len(lines), per_page)] or [[]]
+
+    objects = []
+    page_ids = []
+    font_id = 3
+    objects.append(None)  # 1: catalog, filled below
+    objects.append(None)  # 2: pages, filled below
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for page_lines in pages:
+        ops = [b"BT /F1 10 Tf 12 TL"]
+        for column in range(columns):
+            column_lines = page_lines[column * lines_per_page:(column + 1) * lines_per_page]
+            x = 50 + column * 270
+            ops.append(f"1 0 0 1 {x} 760 Tm".encode())
+            for line in column_lines:
+                width = 48 if columns == 2 else 95
+                ops.append(f"({_escape(line[:width])}) Tj T*".encode('latin-1', 'replace'))
+        ops.append(b"ET")
+        stream = b"\n".join(ops)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font_id, content_id)
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = b" ".join(b"%d 0 R" % i for i in page_ids)
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def build_corpus(seed=0, page_counts=(1, 2, 5, 20), layouts=('single', 'two'),
+                 job_lengths=(100, 400, 1500), jobs_per_length=5):
+    """
+    Build the benchmark corpus in memory.
+    Returns:
+        dict: 'resumes' as (label, pdf bytes, text) and 'jobs' as (label, text).
+    """
+    rng = random.Random(seed)
+    resumes = []
+    for pages in page_counts:
+        for layout in layouts:
+            lines = resume_lines(rng, pages)
+            resumes.append((f"{pages}p-{layout}", make_pdf(lines, layout), '\n'.join(lines)))
+    jobs = [
+        (f"{words}w-{i}", job_description(rng, words))
+        for words in job_lengths for i in range(jobs_per_length)
+    ]
+    return {'resumes': resumes, 'jobs': jobs}
@@ -0,0 +1,302 @@
+"""
+Load-test the web tier under different gunicorn concurrency models.
+
+    python -m benchmarks.load --output load_results.json
+    python -m benchmarks.load --worker-classes gthread gevent --workers 2 4 \\
+        --concurrency 1 8 32 --duration 15 --stub-latency 1.0
+
+For every worker class and worker count, gunicorn serves app:app with
+gunicorn.conf.py against the local stub LLM. Closed-loop clients then post a
+mix of PDF uploads and pasted resumes to / at each concurrency level. Each
+configuration reports one throughput and latency curve: requests per
+second, p50/p95/p99 latency and errors per concurrency level. Worker
+classes whose packages are not installed are recorded as skipped.
+
+Response caches and analysis sessions are off unless --with-caches is
+given, so every request does the full extraction, matching and LLM work.
+"""
+import argparse
+import http.client
+import importlib.util
+import itertools
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+import uuid
+
+from benchmarks.corpus import build_corpus
+from benchmarks.run import percentile
+from benchmarks.stub_openai import StubOpenAIServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Worker class -> module it needs besides gunicorn
+WORKER_CLASS_REQUIREMENTS = {
+    'sync': None,
+    'gthread': None,
+    'gevent': 'gevent',
+}
+
+# Switches off everything that would let repeated inputs skip work
+NO_CACHE_ENV = {
+    'RESUME_CACHE_MEMORY_BYTES': '0',
+    'FEEDBACK_CACHE_MAX_ENTRIES': '0',
+    'ANALYSIS_SESSIONS': '0',
+}
+
+
+def multipart_body(fields, files=()):
+    """
+    Encode a multipart/form-data request body.
+    Args:
+        fields (dict): Form field name to text value.
+        files (list): (field name, file name, bytes) tuples.
+    Returns:
+        tuple: (body bytes, Content-Type header value).
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+                     + value.encode('utf-8') + b'\r\n')
+    for name, filename, data in files:
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; '
+                     f'filename="{filename}"\r\nContent-Type: application/pdf\r\n\r\n'.encode()
+                     + data + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def build_workload(pdf_share=0.5):
+    """
+    Every resume against every job description, a pdf_share fraction of
+    them as PDF uploads and the rest as pasted text.
+    Returns:
+        list: (kind, body, content type) request tuples.
+    """
+    corpus = build_corpus()
+    requests = []
+    pairs = [(resume, job) for resume in corpus['resumes'] for job in corpus['jobs']]
+    for i, ((name, pdf, text), (_, job_description)) in enumerate(pairs):
+        # Spread the PDF requests evenly through the workload
+        if int((i + 1) * pdf_share) > int(i * pdf_share):
+            body, content_type = multipart_body({'job_description': job_description},
+                                                [('resume', f'{name}.pdf', pdf)])
+            requests.append(('pdf', body, content_type))
+        else:
+            body, content_type = multipart_body({'job_description': job_description, 'resume_text': text})
+            requests.append(('text', body, content_type))
+    return requests
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class GunicornServer:
+    """
+    gunicorn serving app:app in a subprocess.
+    Args:
+        worker_class (str): gunicorn worker class.
+        workers (int): Worker processes.
+        threads (int): Threads per gthread worker.
+        env (dict): Extra environment for the server.
+    """
+
+    def __init__(self, worker_class, workers, threads, env=None):
+        self.port = _free_port()
+        self.url = f'http://127.0.0.1:{self.port}/'
+        self._command = [
+            sys.executable, '-m', 'gunicorn', 'app:app', '--config', 'gunicorn.conf.py',
+            # gunicorn turns sync workers with threads > 1 into gthread ones
+            '--worker-class', worker_class, '--workers', str(workers),
+            '--threads', str(threads if worker_class == 'gthread' else 1),
+            '--bind', f'127.0.0.1:{self.port}', '--log-level', 'warning',
+        ]
+        self._env = dict(os.environ, **(env or {}))
+        self._process = None
+
+    def start(self, timeout=60.0):
+        self._process = subprocess.Popen(self._command, cwd=ROOT, env=self._env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                lines = self._process.stderr.read().decode(errors='replace').strip().splitlines()
+                raise RuntimeError(lines[-1] if lines else f"gunicorn exited with {self._process.returncode}")
+            try:
+                with urllib.request.urlopen(self.url, timeout=2):
+                    return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f"gunicorn did not answer within {timeout}s")
+
+    def stop(self):
+        if self._process is not None and self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def drive(url, workload, concurrency, duration, timeout=120.0):
+    """
+    Closed-loop load: each of concurrency clients sends its next request as
+    soon as the previous one finishes, for duration seconds.
+    Args:
+        url (str): Endpoint to post to.
+        workload (list): Requests from build_workload(), sent round-robin.
+        concurrency (int): Simultaneous clients.
+        duration (float): Seconds to keep sending.
+    Returns:
+        dict: Throughput, latency percentiles in milliseconds and error count.
+    """
+    requests = itertools.cycle(workload)
+    lock = threading.Lock()
+    latencies = {'pdf': [], 'text': []}
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def client():
+        while time.monotonic() < deadline:
+            with lock:
+                kind, body, content_type = next(requests)
+            request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type})
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                ok = True
+            except (OSError, http.client.HTTPException) as e:
+                ok, error = False, f"{type(e).__name__}: {e}"
+            elapsed = time.perf_counter() - t0
+            with lock:
+                if ok:
+                    latencies[kind].append(elapsed)
+                else:
+                    errors.append(error)
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    all_latencies = sorted(latencies['pdf'] + latencies['text'])
+    result = {
+        'concurrency': concurrency,
+        'requests': len(all_latencies),
+        'errors': len(errors),
+        'requests_per_sec': round(len(all_latencies) / elapsed, 2),
+        'p50_ms': round(percentile(all_latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(all_latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(all_latencies, 99) * 1000, 1),
+    }
+    for kind, values in latencies.items():
+        result[f'{kind}_p50_ms'] = round(percentile(sorted(values), 50) * 1000, 1)
+    if errors:
+        result['first_error'] = errors[0]
+    return result
+
+
+def run_sweep(worker_classes, worker_counts, concurrency_levels, threads=4, duration=10.0,
+              warmup=2.0, pdf_share=0.5, stub_latency=0.5, caches=False):
+    """
+    Measure every worker class and count at every concurrency level.
+    Returns:
+        list: One dict per configuration with its settings and either a
+            'levels' curve or a 'skipped' reason.
+    """
+    workload = build_workload(pdf_share)
+    results = []
+    has_gunicorn = importlib.util.find_spec('gunicorn') is not None
+    with StubOpenAIServer(latency=stub_latency) as stub:
+        env = {'OPENAI_API_KEY': 'sk-stub', 'OPENAI_BASE_URL': stub.base_url}
+        if not caches:
+            env.update(NO_CACHE_ENV)
+        for worker_class, workers in itertools.product(worker_classes, worker_counts):
+            config = {'worker_class': worker_class, 'workers': workers,
+                      'threads': threads if worker_class == 'gthread' else 1}
+            results.append(config)
+            requirement = WORKER_CLASS_REQUIREMENTS.get(worker_class)
+            missing = 'gunicorn' if not has_gunicorn else requirement
+            if missing and importlib.util.find_spec(missing) is None:
+                config['skipped'] = f"{missing} is not installed"
+                continue
+            try:
+                with GunicornServer(worker_class, workers, threads, env) as server:
+                    if warmup:
+                        drive(server.url, workload, 1, warmup)
+                    config['levels'] = [
+                        drive(server.url, workload, level, duration) for level in concurrency_levels
+                    ]
+            except RuntimeError as e:
+                config['skipped'] = str(e)
+    return results
+
+
+def print_report(results):
+    print(f"{'config':<22}{'clients':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for config in results:
+        name = f"{config['worker_class']} x{config['workers']}"
+        if config['worker_class'] == 'gthread':
+            name += f" ({config['threads']}t)"
+        if 'skipped' in config:
+            print(f"{name:<22}  skipped: {config['skipped']}")
+            continue
+        for level in config['levels']:
+            print(f"{name:<22}{level['concurrency']:>8}{level['requests_per_sec']:>9}{level['p50_ms']:>9}"
+                  f"{level['p95_ms']:>9}{level['p99_ms']:>9}{level['errors']:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', nargs='+', default=['sync', 'gthread', 'gevent'],
+                        choices=sorted(WORKER_CLASS_REQUIREMENTS))
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--threads', type=int, default=4, help='Threads per gthread worker')
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 4, 16, 32])
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2.0)
+    parser.add_argument('--pdf-share', type=float, default=0.5, help='Fraction of requests that upload a PDF')
+    parser.add_argument('--stub-latency', type=float, default=0.5,
+                        help='Seconds the stub OpenAI server waits before answering')
+    parser.add_argument('--with-caches', action='store_true')
+    parser.add_argument('--output', default='load_results.json')
+    args = parser.parse_args(argv)
+
+    results = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'stub_latency': args.stub_latency,
+        'pdf_share': args.pdf_share,
+        'configs': run_sweep(args.worker_classes, args.workers, args.concurrency, args.threads,
+                             args.duration, args.warmup, args.pdf_share, args.stub_latency,
+                             args.with_caches),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print_report(results['configs'])
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
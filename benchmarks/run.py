@@ -0,0 +1,227 @@
+"""
+Benchmark the analyze pipeline stage by stage.
+
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --compare old.json new.json
+
+Each stage reports throughput, p50/p95/p99 latency and peak traced memory.
+Startup stages time a fresh interpreter instead and report its peak RSS.
+Stages whose dependencies are not installed are recorded as skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import build_corpus
+from benchmarks.stub_openai import CANNED_RESPONSES, StubOpenAIServer
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(func, inputs, repeat=3):
+    """
+    Time func over every input, then run one more pass under tracemalloc
+    for the peak allocation.
+    Args:
+        func (callable): Called as func(item) for each input.
+        inputs (list): Benchmark inputs.
+        repeat (int): Timed passes over the inputs.
+    Returns:
+        dict: Throughput, latency percentiles in milliseconds and peak memory.
+    """
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    for item in inputs:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+# Run in a fresh interpreter; prints how long the setup took and peak RSS
+_STARTUP_SCRIPT = """
+import json, resource, time
+start = time.perf_counter()
+{setup}
+print(json.dumps({{'seconds': time.perf_counter() - start,
+                  'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+"""
+
+
+def measure_startup(setup, runs=5, env=None):
+    """
+    Cold-start cost of a worker: run setup code in fresh interpreters.
+    Args:
+        setup (str): Python statements, e.g. "import app".
+        runs (int): Interpreters to start.
+        env (dict): Extra environment variables for the interpreters.
+    Returns:
+        dict: Throughput and latency percentiles of the setup in
+            milliseconds, and the median peak resident memory.
+    """
+    latencies, rss = [], []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, '-c', _STARTUP_SCRIPT.format(setup=setup)],
+            capture_output=True, text=True, env=dict(os.environ, **(env or {})),
+        )
+        if completed.returncode:
+            lines = completed.stderr.strip().splitlines()
+            return {'skipped': lines[-1] if lines else f"exit status {completed.returncode}"}
+        sample = json.loads(completed.stdout.strip().splitlines()[-1])
+        latencies.append(sample['seconds'])
+        rss.append(sample['max_rss_kb'])
+    latencies.sort()
+    rss.sort()
+    return {
+        'calls': runs,
+        'ops_per_sec': round(runs / sum(latencies), 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_rss_kb': rss[len(rss) // 2],
+    }
+
+
+def _skipped(error):
+    return {'skipped': f"{type(error).__name__}: {error}"}
+
+
+def run_benchmarks(repeat=3, stub_latency=0.0):
+    corpus = build_corpus()
+    resumes, jobs = corpus['resumes'], corpus['jobs']
+    stages = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        automaton = os.path.join(tmp, 'skills.automaton')
+        from utils.skill_matcher import SkillMatcher
+        SkillMatcher.from_taxonomy_file().save(automaton)
+        stages['startup_skills'] = measure_startup(
+            f"from utils.skill_matcher import load_skill_matcher; load_skill_matcher({automaton!r})"
+        )
+        stages['startup_app'] = measure_startup('import app', env={'SKILL_AUTOMATON_PATH': automaton})
+
+    try:
+        from utils.pdf_parser import extract_pdf
+        import pdfminer, PyPDF2  # noqa: F401 -- imported lazily by the parser
+        stages['extract_pdf'] = measure(lambda r: extract_pdf(r[1]), resumes, repeat)
+    except ImportError as e:
+        stages['extract_pdf'] = _skipped(e)
+
+    from utils.keyword_matcher import compare_keywords, extract_keywords
+    documents = [text for _, _, text in resumes] + [text for _, text in jobs]
+    stages['extract_keywords'] = measure(extract_keywords, documents, repeat)
+    pairs = [(r[2], j[1]) for r in resumes for j in jobs]
+    stages['compare_keywords'] = measure(lambda p: compare_keywords(*p), pairs, repeat)
+
+    from utils.prompt_builder import PromptBuilder
+    builder = PromptBuilder()
+    stages['pack_resume'] = measure(lambda p: builder.pack_resume(*p), pairs[::len(jobs)], repeat)
+
+    from utils.batch_matcher import batch_compare
+    stages['batch_compare'] = measure(
+        lambda _: batch_compare([r[2] for r in resumes], [j[1] for j in jobs]), [None], repeat
+    )
+
+    from utils import openai_api
+    responses = list(CANNED_RESPONSES.values())
+    stages['json_repair'] = measure(openai_api._parse_feedback, responses, repeat * 20)
+
+    try:
+        import openai  # noqa: F401 -- imported lazily by the LLM client
+    except ImportError as e:
+        stages['get_resume_feedback'] = _skipped(e)
+        return stages
+
+    # End to end against the stub; caching off so every call goes upstream
+    openai_api.configure_feedback_cache(max_entries=0)
+    with StubOpenAIServer(kinds=list(CANNED_RESPONSES), latency=stub_latency) as stub:
+        os.environ['OPENAI_BASE_URL'] = stub.base_url
+        stages['get_resume_feedback'] = measure(
+            lambda p: openai_api.get_resume_feedback(p[0], p[1], 'sk-stub'),
+            pairs[:10], repeat
+        )
+    return stages
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'stage':<22}{'ops/s old':>12}{'ops/s new':>12}{'p95 old':>10}{'p95 new':>10}{'change':>9}")
+    for stage, result in new['stages'].items():
+        before = old['stages'].get(stage, {})
+        if 'skipped' in result or 'skipped' in before or not before:
+            print(f"{stage:<22}{'(skipped or missing)':>44}")
+            continue
+        change = (result['ops_per_sec'] / before['ops_per_sec'] - 1) * 100
+        print(f"{stage:<22}{before['ops_per_sec']:>12}{result['ops_per_sec']:>12}"
+              f"{before['p95_ms']:>10}{result['p95_ms']:>10}{change:>+8.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--stub-latency', type=float, default=0.0,
+                        help='Seconds the stub OpenAI server waits before answering')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'stages': run_benchmarks(args.repeat, args.stub_latency),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    for stage, result in results['stages'].items():
+        print(f"{stage:<22}{json.dumps(result)}")
+    print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
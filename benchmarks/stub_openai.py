@@ -0,0 +1,126 @@
+"""
+Local stand-in for the OpenAI chat completions API. Responses cycle through
+well-formed, fenced, chatty and truncated JSON so the benchmarks exercise
+the repair path in get_resume_feedback. Point the client at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+"""
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_FEEDBACK = {
+    "match_score": 72,
+    "strengths": ["Strong Python experience", "Cloud deployment work", "Led small teams"],
+    "weaknesses": ["No Kubernetes", "Limited frontend work", "Few metrics"],
+    "suggestions": ["Add Kubernetes projects", "Quantify impact", "Mention CI/CD ownership"],
+}
+
+CANNED_RESPONSES = {
+    'valid': json.dumps(_FEEDBACK),
+    'fenced': "```json\n" + json.dumps(_FEEDBACK, indent=2) + "\n```",
+    'chatty': "Sure! Here is the analysis:\n" + json.dumps(_FEEDBACK) + "\nLet me know if you need more.",
+    'truncated': json.dumps(_FEEDBACK)[:-40],
+    'garbage': "I'm sorry, I can't help with that.",
+}
+
+
+class StubOpenAIServer:
+    """
+    Threaded HTTP server answering /v1/chat/completions.
+    Args:
+        kinds (list): Response kinds from CANNED_RESPONSES to cycle through.
+        latency (float): Seconds to sleep before each response.
+    """
+
+    def __init__(self, kinds=('valid', 'fenced', 'chatty', 'truncated'), latency=0.0, port=0):
+        responses = itertools.cycle([CANNED_RESPONSES[kind] for kind in kinds])
+        lock = threading.Lock()
+        self.requests = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                with lock:
+                    content = next(responses)
+                    server.requests += 1
+                if latency:
+                    time.sleep(latency)
+                if request.get('stream'):
+                    self._send_stream(request, content)
+                else:
+                    self._send_json(request, content)
+
+            def _completion(self, request, **choice):
+                return {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request.get('model', 'stub'),
+                    "choices": [dict(index=0, **choice)],
+                }
+
+            def _send_json(self, request, content):
+                body = json.dumps(dict(
+                    self._completion(request, message={"role": "assistant", "content": content},
+                                     finish_reason="stop"),
+                    usage={"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+                )).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_stream(self, request, content):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.end_headers()
+                for i in range(0, len(content), 8):
+                    chunk = self._completion(request, delta={"content": content[i:i + 8]}, finish_reason=None)
+                    chunk['object'] = 'chat.completion.chunk'
+                    self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.write(b"data: [DONE]\n\n")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5)
+    args = parser.parse_args()
+    stub = StubOpenAIServer(latency=args.latency, port=args.port).start()
+    print(f"Stub OpenAI server on {stub.base_url}")
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        stub.stop()
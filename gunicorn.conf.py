@@ -0,0 +1,49 @@
+"""
+Gunicorn settings. The concurrency model is picked per deployment from the
+environment; `python -m benchmarks.load` compares the options on this app.
+
+    GUNICORN_WORKER_CLASS        gthread (default), sync or gevent
+    WEB_CONCURRENCY              Worker processes (default 2)
+    GUNICORN_THREADS             Threads per gthread worker (default 4)
+    GUNICORN_WORKER_CONNECTIONS  Concurrent requests per gevent worker (default 100)
+    GUNICORN_TIMEOUT             Seconds before a silent worker is restarted (default 120)
+    GUNICORN_PRELOAD             1 imports the app once in the master and forks
+                                 workers from it
+
+Requests spend most of their time waiting on the LLM, so gthread or gevent
+workers serve far more of them per process than sync workers. Each worker
+caps its upstream calls at LLM_MAX_CONCURRENCY and answers the rest from
+the fallback backend, so that cap should be at least the worker's request
+concurrency.
+"""
+import os
+import sys
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.getenv('WEB_CONCURRENCY', 2))
+# More than one thread turns sync workers into gthread ones
+threads = int(os.getenv('GUNICORN_THREADS', 4 if worker_class == 'gthread' else 1))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+# Long enough for PDF extraction plus an LLM call with retries
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 120))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+preload_app = os.getenv('GUNICORN_PRELOAD', '0') == '1'
+
+# Workers inherit the master's environment, so defaults set here reach the
+# app's own settings
+if worker_class == 'gthread':
+    os.environ.setdefault('LLM_MAX_CONCURRENCY', str(max(8, threads)))
+elif worker_class == 'gevent':
+    # multiprocessing does not cooperate with gevent's monkey-patching, so
+    # PDFs are extracted inside the worker rather than in a process pool
+    os.environ.setdefault('PDF_PARALLEL_MIN_PAGES', str(sys.maxsize))
+    os.environ.setdefault('PDF_ISOLATE', '0')
+
+
+def when_ready(server):
+    if os.getenv('ASYNC_ANALYSIS') == '1' and server.cfg.workers > 1:
+        server.log.warning(
+            "ASYNC_ANALYSIS keeps job state inside each worker, so status polls "
+            "may reach a worker that does not know the job; run one worker with "
+            "more threads instead"
+        )
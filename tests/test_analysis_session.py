@@ -0,0 +1,125 @@
+from collections import Counter
+
+import pytest
+
+from utils import openai_api
+from utils.analysis_session import AnalysisSession
+from utils.feedback_backends import FeedbackRouter, RulesFeedbackBackend
+from utils.feedback_cache import FeedbackCache
+from utils.keyword_matcher import compare_keywords, extract_keywords
+from utils.resume_document import parse_resume
+from utils.skill_matcher import SkillMatcher
+
+RESUME = """Jane Doe
+SUMMARY
+Backend engineer building data pipelines in Python and Go.
+EXPERIENCE
+- Built REST APIs with Flask and PostgreSQL serving 2M requests a day
+- Ran Kafka consumers on Kubernetes and cut costs 30%
+- Python tooling for CI/CD with Docker
+SKILLS
+Python, Go, SQL, Docker, machine learning
+"""
+
+JOB = """Senior Backend Engineer
+We need Python and Go experience, Kubernetes, Terraform and AWS.
+Machine learning and natural language processing are a plus.
+"""
+
+EDITS = [
+    # (resume, job description); None keeps the current text
+    (RESUME.replace('Flask', 'Django'), None),
+    (RESUME.replace('Flask', 'Django') + '- Terraform modules for AWS accounts\n', None),
+    (None, JOB + 'Docker is required.\n'),
+    (RESUME, None),
+    ('\n'.join(line for line in RESUME.splitlines() if 'Kafka' not in line), JOB),
+    (RESUME + RESUME, None),
+    ('', None),
+    (RESUME, 'Rust developer'),
+]
+
+COMPARED_FIELDS = ('match_score', 'total_job_keywords', 'total_resume_keywords', 'matched_count',
+                   'missing_count', 'matched_skills', 'missing_skills', 'skill_score')
+
+
+@pytest.fixture(scope='module')
+def skill_matcher():
+    return SkillMatcher.from_taxonomy_file()
+
+
+def test_incremental_updates_match_full_comparison(skill_matcher):
+    session = AnalysisSession(skill_matcher=skill_matcher)
+    resume, job = RESUME, JOB
+    session.update(resume, job)
+    for new_resume, new_job in EDITS:
+        resume = resume if new_resume is None else new_resume
+        job = job if new_job is None else new_job
+        result = session.update(new_resume, new_job)
+        expected = compare_keywords(resume, job, skill_matcher=skill_matcher)
+        for field in COMPARED_FIELDS:
+            assert result[field] == expected[field], field
+        assert session.freq['resume'] == Counter(extract_keywords(resume))
+        assert session.freq['job'] == Counter(extract_keywords(job))
+        assert session.matched == set(session.freq['resume']) & set(session.freq['job'])
+        assert session.missing == set(session.freq['job']) - set(session.freq['resume'])
+        assert session.extra == set(session.freq['resume']) - set(session.freq['job'])
+
+
+def test_update_from_resume_document(skill_matcher):
+    session = AnalysisSession(skill_matcher=skill_matcher)
+    session.update(RESUME, JOB)
+    edited = RESUME.replace('Go, SQL', 'Terraform, SQL')
+    result = session.update(resume_document=parse_resume(edited))
+    expected = compare_keywords(edited, JOB, skill_matcher=skill_matcher)
+    for field in COMPARED_FIELDS:
+        assert result[field] == expected[field], field
+
+
+def test_feedback_is_reused_only_while_drift_is_small():
+    session = AnalysisSession()
+    session.update(RESUME, JOB)
+    session.remember_feedback({'match_score': 70, 'source': 'openai', 'cacheable': True})
+    assert session.reusable_feedback(0.05) == {'match_score': 70, 'source': 'openai', 'cacheable': True}
+    session.update(RESUME + 'Docker\n')
+    assert session.drift() > 0
+    session.update('Rust developer with embedded systems experience')
+    assert session.reusable_feedback(0.05) is None
+
+
+class GarbageBackend:
+    """Remote backend whose model answers with text that is not JSON."""
+
+    name = 'openai'
+    model = 'stub'
+    local = False
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate(self, resume_text, job_description, keyword_result=None, api_key=None, on_update=None):
+        self.calls += 1
+        return openai_api._parse_feedback("I'm sorry, I can't produce JSON today.")
+
+
+def test_placeholder_feedback_is_not_reused(monkeypatch):
+    backend = GarbageBackend()
+    monkeypatch.setattr(openai_api, 'feedback_router', FeedbackRouter(backend, fallback=RulesFeedbackBackend()))
+    monkeypatch.setattr(openai_api, 'feedback_cache', FeedbackCache())
+    session = AnalysisSession()
+    for _ in range(2):
+        keyword_result = session.update(RESUME, JOB)
+        assert session.reusable_feedback(0.05) is None
+        feedback = openai_api.get_resume_feedback(RESUME, JOB, 'sk-test', keyword_result)
+        assert feedback['strengths'] == ['Unable to parse AI response']
+        assert not feedback['cacheable']
+        session.remember_feedback(feedback)
+    assert backend.calls == 2
+    assert session.drift() is None
+
+
+def test_rules_feedback_is_not_reused():
+    session = AnalysisSession()
+    keyword_result = session.update(RESUME, JOB)
+    feedback, cacheable = RulesFeedbackBackend().generate(RESUME, JOB, keyword_result)
+    session.remember_feedback(dict(feedback, source='rules', cacheable=cacheable))
+    assert session.reusable_feedback(0.05) is None
@@ -0,0 +1,81 @@
+from utils import openai_api
+from utils.feedback_backends import FeedbackRouter, RulesFeedbackBackend
+from utils.feedback_cache import FeedbackCache
+from utils.json_stream import IncrementalJSONParser
+from utils.llm_client import LLMUnavailable
+from utils.openai_api import _parse_feedback, _snapshot
+
+FEEDBACK = '{"match_score": 72, "strengths": ["Python"], "weaknesses": ["Go"], "suggestions": ["Add metrics"]}'
+
+
+def test_fenced_response():
+    feedback, cacheable = _parse_feedback(f"```json\n{FEEDBACK}\n```")
+    assert feedback == {'match_score': 72, 'strengths': ['Python'], 'weaknesses': ['Go'],
+                        'suggestions': ['Add metrics']}
+    assert cacheable
+
+
+def test_chatty_response_with_braces_before_the_object():
+    feedback, cacheable = _parse_feedback(f"Sure {{here}} is the analysis: {FEEDBACK} Hope it helps!")
+    assert feedback['match_score'] == 72
+    assert feedback['suggestions'] == ['Add metrics']
+    assert cacheable
+
+
+def test_truncated_response_keeps_completed_fields():
+    feedback, cacheable = _parse_feedback(FEEDBACK[:FEEDBACK.index('"weaknesses"') + 20])
+    assert feedback['match_score'] == 72
+    assert feedback['strengths'] == ['Python']
+    assert feedback['suggestions'] == ['Unable to parse suggestions']
+    assert not cacheable
+
+
+def test_unparseable_response_falls_back():
+    feedback, cacheable = _parse_feedback("I cannot help with that.")
+    assert feedback['match_score'] == 50
+    assert not cacheable
+
+
+def test_chunked_feed_emits_elements_as_they_complete():
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(FEEDBACK), 7):
+        events.extend(parser.feed(FEEDBACK[i:i + 7]))
+    assert (('strengths', 0), 'Python') in events
+    assert parser.close()['weaknesses'] == ['Go']
+
+
+def test_surrogate_pairs_are_combined():
+    parser = IncrementalJSONParser()
+    parser.feed('{"strengths": ["\\uD83D\\uDE00 shipped"]}')
+    assert parser.close() == {'strengths': ['\U0001F600 shipped']}
+
+
+def test_snapshot_keeps_only_valid_fields():
+    parser = IncrementalJSONParser()
+    parser.feed('{"match_score": "high", "strengths": ["Python", 3], "weaknesses": ["Go"')
+    assert _snapshot(parser.root) == {'strengths': ['Python'], 'weaknesses': ['Go']}
+
+
+class DroppedStreamBackend:
+    """Remote backend that streams one field and then loses the connection."""
+
+    name = 'openai'
+    model = 'stub'
+    local = False
+
+    def generate(self, resume_text, job_description, keyword_result=None, api_key=None, on_update=None):
+        on_update({'strengths': ['Streamed before the failure']})
+        raise LLMUnavailable("connection reset")
+
+
+def test_fallback_withdraws_streamed_feedback(monkeypatch):
+    monkeypatch.setattr(openai_api, 'feedback_router',
+                        FeedbackRouter(DroppedStreamBackend(), fallback=RulesFeedbackBackend()))
+    monkeypatch.setattr(openai_api, 'feedback_cache', FeedbackCache())
+    updates = []
+    feedback = openai_api.get_resume_feedback("Python developer", "Python and Go", 'sk-test',
+                                              on_update=updates.append)
+    assert updates[:2] == [{'strengths': ['Streamed before the failure']}, None]
+    assert feedback['source'] == 'rules'
+    assert 'Streamed before the failure' not in feedback['strengths']
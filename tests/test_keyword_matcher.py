@@ -0,0 +1,27 @@
+import pytest
+
+from utils.keyword_matcher import KeywordTokenizer, extract_keywords
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('C++17 and c++11', ['c++', 'c++']),
+    ('Modern C++0x code', ['modern', 'c++', 'code']),
+    ('C#10 on .NET8', ['c#', '.net']),
+    ('C#/.NET', ['c#', '.net']),
+])
+def test_versioned_protected_terms_keep_the_term(text, expected):
+    assert extract_keywords(text) == expected
+
+
+@pytest.mark.parametrize('text, unexpected', [
+    ('Java/Bash', 'a/b'),
+    ('company.network', '.net'),
+    ('stackc++', 'c++'),
+])
+def test_protected_terms_match_only_whole_tokens(text, unexpected):
+    assert unexpected not in extract_keywords(text)
+
+
+def test_fingerprint_follows_configuration():
+    assert KeywordTokenizer().fingerprint == KeywordTokenizer().fingerprint
+    assert KeywordTokenizer().fingerprint != KeywordTokenizer(protected_terms={'c++'}).fingerprint
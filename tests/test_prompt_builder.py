@@ -0,0 +1,36 @@
+import sys
+import types
+
+from utils.prompt_builder import PromptBuilder, TokenCounter
+
+RESUME = "Jane Doe\njane@example.com | +1 555 0100\n\nEXPERIENCE\n" + "\n\n".join(
+    f"Acme Corp {i}\n- Built Python services on Kubernetes and AWS, cutting latency {i}0%\n"
+    f"- Led migrations of Django apps to Go microservices"
+    for i in range(40)
+) + "\n\nEDUCATION\nBSc Computer Science, State University\n\nSKILLS\nPython, Go, AWS, Kubernetes, Django\n"
+
+JOB = "Backend engineer with Python, Go, Kubernetes and AWS experience."
+
+
+def test_packed_resume_keeps_header_and_every_section():
+    builder = PromptBuilder(resume_tokens=300)
+    packed = builder.pack_resume(RESUME, JOB)
+    assert builder.counter.count(packed) <= 300
+    assert packed.startswith("Jane Doe\njane@example.com")
+    for heading in ('EXPERIENCE', 'EDUCATION', 'SKILLS'):
+        assert heading in packed.splitlines()
+    assert "BSc Computer Science" in packed
+
+
+def test_resume_under_budget_is_unchanged():
+    assert PromptBuilder(resume_tokens=10000).pack_resume(RESUME, JOB) == RESUME
+
+
+def test_encoding_load_failure_falls_back_to_approximation(monkeypatch):
+    def encoding_for_model(model):
+        raise OSError("could not download cl100k_base.tiktoken")
+
+    monkeypatch.setitem(sys.modules, 'tiktoken', types.SimpleNamespace(encoding_for_model=encoding_for_model))
+    counter = TokenCounter()
+    assert counter.encoding is None
+    assert counter.count("hello world") > 0
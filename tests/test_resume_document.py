@@ -0,0 +1,46 @@
+import pytest
+
+from utils.resume_document import is_heading, parse_resume
+
+
+@pytest.mark.parametrize('line', [
+    'EXPERIENCE',
+    'PROFESSIONAL EXPERIENCE',
+    'Work History',
+    'Technical Skills:',
+    'SKILLS & TOOLS',
+    'Honors and Awards',
+])
+def test_headings(line):
+    assert is_heading(line)
+
+
+@pytest.mark.parametrize('line', [
+    'Technical Lead',
+    'History Teacher',
+    'Led a team of 5 to ship:',
+    'Education: BSc Computer Science',
+    'AWS, GCP, SQL',
+    'JAVA/BASH',
+    'JANE DOE',
+    'skills',
+    '- Skills',
+])
+def test_not_headings(line):
+    assert not is_heading(line)
+
+
+def test_job_titles_stay_inside_their_section():
+    document = parse_resume(
+        "Jane Doe\n"
+        "EXPERIENCE\n"
+        "Technical Lead\n"
+        "Led a team of 5 to ship:\n"
+        "- a payments API\n"
+        "History Teacher\n"
+        "SKILLS\n"
+        "Python, Go\n"
+    )
+    assert [(section.kind, section.heading) for section in document.sections] == [
+        ('header', ''), ('experience', 'EXPERIENCE'), ('skills', 'SKILLS'),
+    ]
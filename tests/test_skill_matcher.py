@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from utils.skill_matcher import DEFAULT_TAXONOMY_PATH, MappedSkillMatcher, SkillMatcher, load_skill_matcher
+
+DOCUMENTS = [
+    "Senior engineer: Python, machine learning, Amazon Web Services and CI/CD pipelines.",
+    "Built REST APIs in Node.js and C#/.NET; deployed with Docker and Kubernetes on GCP.",
+    "Java/Bash scripting, company.network admin, natural language processing research.",
+    "",
+]
+
+
+@pytest.fixture(scope='module')
+def matchers(tmp_path_factory):
+    matcher = SkillMatcher.from_taxonomy_file()
+    path = str(tmp_path_factory.mktemp('automaton') / 'skills.automaton')
+    matcher.save(path)
+    mapped = SkillMatcher.load(path)
+    yield matcher, mapped
+    mapped.close()
+
+
+@pytest.mark.parametrize('text', DOCUMENTS)
+def test_mapped_matcher_finds_the_same_skills(matchers, text):
+    matcher, mapped = matchers
+    assert mapped.find_skills(text) == matcher.find_skills(text)
+
+
+def test_mapped_matcher_finds_every_skill_name(matchers):
+    matcher, mapped = matchers
+    with open(DEFAULT_TAXONOMY_PATH, encoding='utf-8') as f:
+        text = '. '.join(name for canonical, synonyms in json.load(f).items() for name in [canonical, *synonyms])
+    assert mapped.find_skills(text) == matcher.find_skills(text)
+
+
+def test_automaton_is_rebuilt_when_the_taxonomy_changes(tmp_path):
+    taxonomy = tmp_path / 'skills.json'
+    taxonomy.write_text(json.dumps({'Python': ['python3']}))
+    automaton = str(tmp_path / 'skills.automaton')
+    load_skill_matcher(automaton, str(taxonomy)).close()
+
+    taxonomy.write_text(json.dumps({'Python': ['python3'], 'Rust': []}))
+    matcher = load_skill_matcher(automaton, str(taxonomy))
+    assert isinstance(matcher, MappedSkillMatcher)
+    assert matcher.find_skills('python3 and rust') == {'Python': 1, 'Rust': 1}
+    matcher.close()
+
+
+def test_unwritable_automaton_path_keeps_the_matcher_in_memory(tmp_path):
+    matcher = load_skill_matcher(str(tmp_path / 'missing' / 'skills.automaton'))
+    assert isinstance(matcher, SkillMatcher)
+    assert matcher.find_skills('python') == SkillMatcher.from_taxonomy_file().find_skills('python')
+
+
+@pytest.mark.parametrize('text, count', [
+    ('Google Cloud Platform', 1),
+    ('google cloud, then google cloud platform', 2),
+    ('GCP and Google Cloud', 2),
+])
+def test_overlapping_names_of_one_skill_count_once(matchers, text, count):
+    for matcher in matchers:
+        assert matcher.find_skills(text) == {'Google Cloud Platform': count}
@@ -0,0 +1,234 @@
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from utils.keyword_matcher import extract_keywords, score_match, summarize_match
+from utils.skill_matcher import compare_skills
+
+RESUME = 'resume'
+JOB = 'job'
+
+
+class AnalysisSession:
+    """
+    Keyword analysis state for one user across resubmissions.
+
+    Keeps the keyword counts of the current resume and job description and
+    the matched, missing and extra keyword sets. When a resubmission edits
+    one side, only the lines that changed are tokenized, and the counts and
+    sets are updated from the resulting keyword diff, so the work is
+    proportional to the edit rather than to the documents. Tokenization is
+    line-local, so this gives the same counts as tokenizing the whole text.
+
+    The last LLM feedback is kept too, with the keyword change accumulated
+    since it was generated; reusable_feedback() returns it while that change
+    stays small.
+    Args:
+        scoring (str): 'overlap' or 'bm25', as in compare_keywords().
+        corpus_index (JobCorpusIndex): Required for 'bm25' scoring; every new
+            job description is added to it.
+        skill_matcher (SkillMatcher): Optional multi-word skill matcher.
+    """
+
+    def __init__(self, scoring='overlap', corpus_index=None, skill_matcher=None):
+        self.scoring = scoring
+        self.corpus_index = corpus_index
+        self.skill_matcher = skill_matcher
+        self.freq = {RESUME: Counter(), JOB: Counter()}
+        self.matched = set()
+        self.missing = set()
+        self.extra = set()
+        self.touched = time.monotonic()
+        self._texts = {RESUME: None, JOB: None}
+        self._lines = {RESUME: Counter(), JOB: Counter()}
+        self._line_keywords = {}
+        self._skills = {RESUME: None, JOB: None}
+        self._totals = {RESUME: 0, JOB: 0}
+        self._feedback = None
+        self._feedback_totals = {RESUME: 0, JOB: 0}
+        self._drift = {RESUME: Counter(), JOB: Counter()}
+        self._drift_size = {RESUME: 0, JOB: 0}
+        self._lock = threading.Lock()
+
+    def update(self, resume_text=None, job_description=None, resume_document=None):
+        """
+        Bring the session up to date with the submitted texts.
+        Args:
+            resume_text (str): Resume text, or None to keep the current one.
+            job_description (str): Job description, or None to keep the current one.
+            resume_document (ResumeDocument): Parsed resume, used instead of
+                resume_text; its memoized words feed the skill matcher.
+        Returns:
+            dict: Same shape as compare_keywords() output.
+        """
+        if resume_document is not None:
+            resume_text = resume_document.text
+        with self._lock:
+            self.touched = time.monotonic()
+            for side, text in ((RESUME, resume_text), (JOB, job_description)):
+                if text is not None and text != self._texts[side]:
+                    self._apply(side, self._keyword_diff(side, text))
+                    self._texts[side] = text
+                    self._skills[side] = None
+                    if side == JOB and self.corpus_index is not None:
+                        self.corpus_index.add_document(text, self.freq[JOB])
+            return self._result(resume_document)
+
+    def _keyword_diff(self, side, text):
+        """
+        Returns:
+            Counter: Keyword count changes between the side's current text
+                and text, from tokenizing only the lines that differ.
+        """
+        lines = Counter(line.strip() for line in text.splitlines())
+        del lines['']
+        previous = self._lines[side]
+        diff = Counter()
+        for line, count in (lines - previous).items():
+            keywords = self._line_keywords.get(line)
+            if keywords is None:
+                keywords = self._line_keywords[line] = extract_keywords(line)
+            for keyword in keywords:
+                diff[keyword] += count
+        removed = previous - lines
+        for line, count in removed.items():
+            for keyword in self._line_keywords[line]:
+                diff[keyword] -= count
+        self._lines[side] = lines
+        other = self._lines[JOB if side == RESUME else RESUME]
+        for line in removed:
+            if line not in lines and line not in other:
+                del self._line_keywords[line]
+        return diff
+
+    def _apply(self, side, diff):
+        freq = self.freq[side]
+        other = self.freq[JOB if side == RESUME else RESUME]
+        drift = self._drift[side]
+        for keyword, change in diff.items():
+            if not change:
+                continue
+            before = freq[keyword]
+            after = before + change
+            if after:
+                freq[keyword] = after
+            else:
+                del freq[keyword]
+            self._totals[side] += change
+            self._drift_size[side] += abs(drift[keyword] + change) - abs(drift[keyword])
+            drift[keyword] += change
+            if before and after:
+                continue
+            # The keyword appeared on or disappeared from this side
+            if side == RESUME and keyword in other:
+                (self.matched.add if after else self.matched.discard)(keyword)
+                (self.missing.discard if after else self.missing.add)(keyword)
+            elif side == RESUME:
+                (self.extra.add if after else self.extra.discard)(keyword)
+            elif keyword in other:
+                (self.matched.add if after else self.matched.discard)(keyword)
+                (self.extra.discard if after else self.extra.add)(keyword)
+            else:
+                (self.missing.add if after else self.missing.discard)(keyword)
+
+    def _result(self, resume_document=None):
+        resume_freq, job_freq = self.freq[RESUME], self.freq[JOB]
+        match_score, weights = score_match(job_freq, self.matched, self.scoring, self.corpus_index)
+        result = summarize_match(resume_freq, job_freq, self.matched, self.missing, self.extra,
+                                 match_score, weights, self.scoring)
+        if self.skill_matcher is not None:
+            if self._skills[RESUME] is None:
+                words = resume_document.words() if resume_document is not None else None
+                self._skills[RESUME] = self.skill_matcher.find_skills(self._texts[RESUME] or '', words)
+            if self._skills[JOB] is None:
+                self._skills[JOB] = self.skill_matcher.find_skills(self._texts[JOB] or '')
+            result.update(compare_skills(self._skills[RESUME], self._skills[JOB]))
+        return result
+
+    def drift(self):
+        """
+        How far the keywords moved since the last remembered feedback: the
+        total change in keyword counts relative to the keyword count at that
+        time, for whichever side changed more.
+        Returns:
+            float: 0 for no change; None if no feedback was remembered.
+        """
+        with self._lock:
+            if self._feedback is None:
+                return None
+            return max(self._drift_size[side] / max(1, self._feedback_totals[side]) for side in (RESUME, JOB))
+
+    def reusable_feedback(self, max_drift):
+        """
+        Args:
+            max_drift (float): Largest drift() at which feedback is reused;
+                0 or None disables reuse.
+        Returns:
+            dict: Copy of the last remembered feedback, or None.
+        """
+        if not max_drift:
+            return None
+        drift = self.drift()
+        if drift is None or drift > max_drift:
+            return None
+        with self._lock:
+            return dict(self._feedback)
+
+    def remember_feedback(self, feedback):
+        """
+        Keep feedback generated for the session's current texts and reset the
+        drift measured against it. Feedback that is not cacheable (parse
+        failure placeholders, truncated fields, local rules output) is not
+        kept, so the next submission asks the backend again.
+        Args:
+            feedback (dict): get_resume_feedback() output, or None.
+        """
+        if feedback is None or not feedback.get('cacheable'):
+            return
+        with self._lock:
+            self._feedback = dict(feedback)
+            self._feedback_totals = dict(self._totals)
+            self._drift = {RESUME: Counter(), JOB: Counter()}
+            self._drift_size = {RESUME: 0, JOB: 0}
+
+
+class AnalysisSessionStore:
+    """
+    Per-process LRU of analysis sessions keyed by session id, expiring
+    sessions idle for more than ttl_seconds.
+
+    Sessions live in this process only; with several gunicorn workers a
+    resubmission that lands on another worker starts a fresh session and
+    is analyzed from scratch.
+    Args:
+        max_sessions (int): Sessions kept; 0 disables sessions.
+        ttl_seconds (float): Idle time before a session is dropped.
+        **session_settings: Passed to every new AnalysisSession.
+    """
+
+    def __init__(self, max_sessions=1000, ttl_seconds=3600, **session_settings):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.session_settings = session_settings
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Args:
+            session_id (str): Caller's session id.
+        Returns:
+            AnalysisSession: The live session for the id, created if it was
+                unknown or expired, or a throwaway one if sessions are disabled.
+        """
+        if not self.max_sessions or not session_id:
+            return AnalysisSession(**self.session_settings)
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None or now - session.touched > self.ttl_seconds:
+                session = self._sessions[session_id] = AnalysisSession(**self.session_settings)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            return session
@@ -0,0 +1,146 @@
+from utils.keyword_matcher import extract_keywords, get_keyword_frequency
+
+
+class KeywordDocument:
+    """
+    A document tokenized once, with its keyword frequencies and a bitset of
+    its distinct keywords over a shared vocabulary.
+    """
+
+    __slots__ = ('index', 'freq', 'mask', 'size')
+
+    def __init__(self, index, freq, mask):
+        self.index = index
+        self.freq = freq
+        self.mask = mask
+        self.size = len(freq)
+
+
+class KeywordVocabulary:
+    """
+    Maps keywords to bit positions so keyword sets can be intersected as
+    Python integers instead of building per-pair set objects.
+    """
+
+    def __init__(self):
+        self._bits = {}
+
+    def encode(self, freq):
+        mask = 0
+        bits = self._bits
+        for word in freq:
+            bit = bits.get(word)
+            if bit is None:
+                bit = bits[word] = len(bits)
+            mask |= 1 << bit
+        return mask
+
+    def __len__(self):
+        return len(self._bits)
+
+
+def build_documents(texts, vocabulary):
+    """
+    Tokenize each text once and encode it against the shared vocabulary.
+    Args:
+        texts (list): Document texts.
+        vocabulary (KeywordVocabulary): Vocabulary shared by all documents.
+    Returns:
+        list: KeywordDocument per text, in input order.
+    """
+    documents = []
+    for index, text in enumerate(texts):
+        freq = get_keyword_frequency(extract_keywords(text))
+        documents.append(KeywordDocument(index, freq, vocabulary.encode(freq)))
+    return documents
+
+
+def _pair_details(resume, job, score):
+    matched = resume.freq.keys() & job.freq.keys()
+    missing = job.freq.keys() - resume.freq.keys()
+    top_matched = sorted(matched, key=lambda w: min(resume.freq[w], job.freq[w]), reverse=True)[:10]
+    top_missing = sorted(missing, key=lambda w: job.freq[w], reverse=True)[:10]
+    return {
+        'resume_index': resume.index,
+        'job_index': job.index,
+        'match_score': score,
+        'matched_keywords': top_matched,
+        'missing_keywords': top_missing,
+        'matched_count': len(matched),
+        'missing_count': len(missing),
+    }
+
+
+def score_matrix(resume_docs, job_docs):
+    """
+    Compute keyword match scores for every resume/job pair.
+    Args:
+        resume_docs (list): KeywordDocument list for resumes.
+        job_docs (list): KeywordDocument list for job descriptions.
+    Returns:
+        list: Rows of match scores (0-100), one row per resume.
+    """
+    matrix = []
+    for resume in resume_docs:
+        resume_mask = resume.mask
+        matrix.append([
+            round((resume_mask & job.mask).bit_count() / job.size * 100, 1) if job.size else 0
+            for job in job_docs
+        ])
+    return matrix
+
+
+def batch_compare(resume_texts, job_descriptions, top_n=None):
+    """
+    Score many resumes against many job descriptions in one pass. Each
+    document is tokenized exactly once; pairwise overlaps use bitset
+    intersections over a shared vocabulary.
+    Args:
+        resume_texts (list): Resume texts.
+        job_descriptions (list): Job description texts.
+        top_n (int): Optional number of best pairs to return.
+    Returns:
+        list: Pair results sorted by match score, best first. Each has the
+            same matched/missing fields as compare_keywords.
+    """
+    vocabulary = KeywordVocabulary()
+    resume_docs = build_documents(resume_texts, vocabulary)
+    job_docs = build_documents(job_descriptions, vocabulary)
+    matrix = score_matrix(resume_docs, job_docs)
+
+    ranked = sorted(
+        ((score, r, j) for r, row in enumerate(matrix) for j, score in enumerate(row)),
+        key=lambda item: item[0],
+        reverse=True
+    )
+    if top_n is not None:
+        ranked = ranked[:top_n]
+
+    # Only materialize keyword lists for the pairs that are returned
+    return [_pair_details(resume_docs[r], job_docs[j], score) for score, r, j in ranked]
+
+
+def rank_jobs_for_resume(resume_text, job_descriptions, top_n=None):
+    """
+    Rank job descriptions by how well one resume matches them.
+    Args:
+        resume_text (str): Resume text.
+        job_descriptions (list): Job description texts.
+        top_n (int): Optional number of results to return.
+    Returns:
+        list: Pair results sorted by match score, best first.
+    """
+    return batch_compare([resume_text], job_descriptions, top_n)
+
+
+def rank_resumes_for_job(resume_texts, job_description, top_n=None):
+    """
+    Rank resumes by how well they match one job description.
+    Args:
+        resume_texts (list): Resume texts.
+        job_description (str): Job description text.
+        top_n (int): Optional number of results to return.
+    Returns:
+        list: Pair results sorted by match score, best first.
+    """
+    return batch_compare(resume_texts, [job_description], top_n)
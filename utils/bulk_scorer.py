@@ -0,0 +1,397 @@
+"""
+Score a directory (or manifest) of resumes against job descriptions offline.
+
+    python -m utils.bulk_scorer --input resumes/ --job job.txt --output scores.jsonl
+    python -m utils.bulk_scorer --manifest todo.txt --job a.txt --job b.txt --output scores.csv --resume
+    python -m utils.bulk_scorer --input resumes/ --job job.txt --output scores.jsonl --feedback --feedback-rpm 60
+
+Extraction and keyword scoring run in a process pool; results are written
+as they finish, one row per resume and job. Rerunning with --resume skips
+resumes already scored without errors against every job, so a crashed run
+can pick up where it stopped and failed resumes are retried. Only a bounded window of resumes is in flight at any time.
+"""
+import argparse
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+logger = logging.getLogger(__name__)
+
+INPUT_EXTENSIONS = ('.pdf', '.txt')
+CSV_FIELDS = [
+    'path', 'job', 'match_score', 'skill_score', 'matched_keywords', 'missing_keywords',
+    'matched_skills', 'missing_skills', 'backend', 'pages', 'partial', 'error',
+    'feedback_score', 'strengths', 'weaknesses', 'suggestions', 'feedback_source',
+]
+
+# Per-worker state, set once by _init_worker
+_jobs = None
+_skill_matcher = None
+
+
+def iter_inputs(input_dir=None, manifest=None, extensions=INPUT_EXTENSIONS):
+    """
+    Lazily list resume files from a directory tree or a manifest file with
+    one path per line (blank lines and '#' comments are skipped).
+    Yields:
+        str: Path of a resume file.
+    """
+    if manifest:
+        with open(manifest, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield line
+    if input_dir:
+        for root, dirs, files in os.walk(input_dir):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith(extensions):
+                    yield os.path.join(root, name)
+
+
+def job_labels(paths):
+    """
+    Label each job description by its file name, or by its path relative to
+    the working directory where names collide, so rows of different jobs
+    never share a label.
+    Args:
+        paths (list): Job description file paths.
+    Returns:
+        list: One unique label per path.
+    """
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    labels = [
+        name if names.count(name) == 1 else os.path.splitext(os.path.relpath(path))[0]
+        for name, path in zip(names, paths)
+    ]
+    # The same file given twice
+    seen = {}
+    for i, label in enumerate(labels):
+        seen[label] = seen.get(label, 0) + 1
+        if seen[label] > 1:
+            labels[i] = f'{label}~{seen[label]}'
+    return labels
+
+
+def load_checkpoint(output_path, labels, fmt='jsonl'):
+    """
+    Find resumes that already have an error-free row for every job in an
+    earlier output file, and rewrite the file to hold only those rows, one
+    per resume and job. Rows of failed or unfinished resumes, duplicates and
+    lines cut off or garbled by a crash are dropped, so the rerun appends
+    each remaining resume exactly once.
+    Args:
+        output_path (str): JSONL or CSV output of a previous run.
+        labels (list): Job labels every completed resume has a row for.
+        fmt (str): 'jsonl' or 'csv'.
+    Returns:
+        set: Paths to skip.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    labels = set(labels)
+    completed = {}  # path -> {job label: row}
+    with open(output_path, encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            # A short or overlong row has None keys or values
+            rows = (row for row in csv.DictReader(f) if None not in row and None not in row.values())
+        else:
+            rows = (_parse_json_row(line) for line in f)
+        for row in rows:
+            if not isinstance(row, dict) or not row.get('path') or row.get('job') not in labels or row.get('error'):
+                continue
+            completed.setdefault(row['path'], {})[row['job']] = row
+    done = {path: jobs for path, jobs in completed.items() if len(jobs) == len(labels)}
+
+    tmp_path = f'{output_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            for jobs in done.values():
+                writer.writerows(jobs.values())
+        else:
+            for jobs in done.values():
+                f.writelines(json.dumps(row) + '\n' for row in jobs.values())
+    os.replace(tmp_path, output_path)
+    return set(done)
+
+
+def _parse_json_row(line):
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def _init_worker(jobs, skill_automaton_path):
+    global _jobs, _skill_matcher
+    # Already inside a pool process: no nested per-page pool in extract_pdf
+    os.environ['PDF_PARALLEL_MIN_PAGES'] = str(sys.maxsize)
+    os.environ['PDF_ISOLATE'] = '0'
+    from utils.keyword_matcher import extract_keywords, get_keyword_frequency
+    from utils.skill_matcher import load_skill_matcher
+
+    _jobs = [(label, text, get_keyword_frequency(extract_keywords(text))) for label, text in jobs]
+    _skill_matcher = load_skill_matcher(skill_automaton_path)
+
+
+def score_file(path):
+    """
+    Extract one resume and score it against every job. Runs in a pool worker.
+    Args:
+        path (str): PDF or plain-text resume.
+    Returns:
+        tuple: (list of row dicts, resume text for optional LLM feedback).
+    """
+    from utils.keyword_matcher import compare_keywords
+    from utils.resume_document import parse_resume
+
+    info = {'path': path, 'backend': None, 'pages': None, 'partial': False}
+    try:
+        if path.lower().endswith('.pdf'):
+            from utils.pdf_parser import extract_pdf
+            result = extract_pdf(path)
+            document = result['document']
+            info.update(backend=result['backend'], pages=result['pages_read'], partial=result['partial'])
+        else:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                document = parse_resume(f.read())
+        if not document.text:
+            raise ValueError("no text could be extracted")
+    except Exception as e:
+        return [dict(info, job=label, error=str(e)) for label, _, _ in _jobs], None
+
+    rows = []
+    for label, job_text, job_freq in _jobs:
+        keyword_result = compare_keywords(document.text, job_text, job_freq=job_freq,
+                                          skill_matcher=_skill_matcher, resume_document=document)
+        rows.append(dict(
+            info,
+            job=label,
+            match_score=keyword_result['match_score'],
+            skill_score=keyword_result.get('skill_score'),
+            matched_keywords=keyword_result['matched_keywords'],
+            missing_keywords=keyword_result['missing_keywords'],
+            matched_skills=keyword_result.get('matched_skills', []),
+            missing_skills=keyword_result.get('missing_skills', []),
+            keyword_result=keyword_result,
+            error=None,
+        ))
+    return rows, document.text
+
+
+class ResultWriter:
+    """
+    Appends rows to a JSONL or CSV file, flushing after every resume so a
+    crash loses at most the rows in flight.
+    """
+
+    def __init__(self, path, fmt):
+        self.fmt = fmt
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a', encoding='utf-8', newline='')
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction='ignore')
+            if new_file:
+                self._csv.writeheader()
+
+    def write(self, rows):
+        for row in rows:
+            row = {key: value for key, value in row.items() if key != 'keyword_result'}
+            feedback = row.pop('feedback', None)
+            if self._csv is not None:
+                if feedback:
+                    row.update(feedback_score=feedback['match_score'], feedback_source=feedback.get('source'),
+                               **{key: feedback[key] for key in ('strengths', 'weaknesses', 'suggestions')})
+                self._csv.writerow({key: '; '.join(value) if isinstance(value, list) else value
+                                    for key, value in row.items()})
+            else:
+                if feedback is not None:
+                    row['feedback'] = feedback
+                self._file.write(json.dumps(row) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class RateLimiter:
+    """
+    Token bucket allowing rate_per_minute acquisitions per minute, with
+    bursts of up to burst. acquire() blocks until a token is available.
+    """
+
+    def __init__(self, rate_per_minute, burst=1):
+        self.rate = rate_per_minute / 60.0
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_seconds = (1 - self._tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+def _with_feedback(rows, resume_text, jobs, limiter, api_key):
+    from utils.openai_api import get_resume_feedback
+
+    job_texts = dict(jobs)
+    for row in rows:
+        if row.get('error') is None:
+            limiter.acquire()
+            try:
+                row['feedback'] = get_resume_feedback(resume_text, job_texts[row['job']], api_key,
+                                                      row['keyword_result'])
+            except Exception as e:
+                # Keep the keyword scores and let the other rows go on
+                row['error'] = f"feedback: {e}"
+    return rows
+
+
+def run(paths, jobs, output, fmt='jsonl', workers=None, resume=False, skill_automaton_path=None,
+        feedback=False, feedback_rpm=60, feedback_workers=4, api_key=None):
+    """
+    Score resumes in a process pool and stream rows to output.
+    Args:
+        paths (iterable): Resume file paths; consumed lazily.
+        jobs (list): (label, job description text) pairs with unique labels.
+        output (str): Output file path.
+        fmt (str): 'jsonl' or 'csv'.
+        workers (int): Pool size; defaults to the CPU count.
+        resume (bool): Skip resumes already complete in output.
+        skill_automaton_path (str): Compiled skill automaton to load in workers.
+        feedback (bool): Add LLM feedback through a rate-limited thread queue.
+        feedback_rpm (int): Maximum LLM requests per minute.
+        feedback_workers (int): Concurrent LLM requests.
+        api_key (str): OpenAI API key for feedback.
+    Returns:
+        dict: Counts of scored, failed and skipped resumes.
+    """
+    workers = workers or os.cpu_count() or 1
+    done = load_checkpoint(output, [label for label, _ in jobs], fmt) if resume else set()
+    if not resume and os.path.exists(output):
+        os.remove(output)
+    writer = ResultWriter(output, fmt)
+    # Bounded window: memory stays flat however many files there are
+    window = workers * 4
+    stats = {'scored': 0, 'failed': 0, 'skipped': 0}
+
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(jobs, skill_automaton_path),
+    )
+    feedback_pool = None
+    limiter = None
+    if feedback:
+        from utils.openai_api import configure_llm_client
+        # Queue for a slot instead of falling back while the pool is busy
+        configure_llm_client(max_concurrency=feedback_workers, acquire_timeout=600)
+        feedback_pool = ThreadPoolExecutor(max_workers=feedback_workers, thread_name_prefix='feedback')
+        limiter = RateLimiter(feedback_rpm, burst=feedback_workers)
+
+    scoring, annotating = set(), set()
+    paths = iter(paths)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(scoring) + len(annotating) < window:
+                path = next(paths, None)
+                if path is None:
+                    exhausted = True
+                elif path in done:
+                    stats['skipped'] += 1
+                else:
+                    scoring.add(pool.submit(score_file, path))
+            if not scoring and not annotating:
+                break
+
+            finished, _ = wait(scoring | annotating, return_when=FIRST_COMPLETED)
+            for future in finished:
+                if future in scoring:
+                    scoring.discard(future)
+                    rows, resume_text = future.result()
+                    if feedback_pool is not None and resume_text:
+                        annotating.add(feedback_pool.submit(_with_feedback, rows, resume_text,
+                                                            jobs, limiter, api_key))
+                        continue
+                else:
+                    annotating.discard(future)
+                    rows = future.result()
+                writer.write(rows)
+                stats['failed' if any(row.get('error') for row in rows) else 'scored'] += 1
+                total = stats['scored'] + stats['failed']
+                if total % 100 == 0:
+                    logger.info("Processed %d resumes (%d failed, %d skipped)",
+                                total, stats['failed'], stats['skipped'])
+    finally:
+        pool.shutdown(cancel_futures=True)
+        if feedback_pool is not None:
+            feedback_pool.shutdown()
+        writer.close()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', help='Directory of .pdf and .txt resumes, searched recursively')
+    parser.add_argument('--manifest', help='File listing one resume path per line')
+    parser.add_argument('--job', action='append', required=True,
+                        help='Job description text file; repeat to score against several')
+    parser.add_argument('--output', required=True, help='Output .jsonl or .csv file')
+    parser.add_argument('--format', choices=['jsonl', 'csv'],
+                        help='Output format; defaults to the output file extension')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    parser.add_argument('--resume', action='store_true', help='Skip resumes already scored in the output file')
+    parser.add_argument('--skill-automaton', default=os.getenv('SKILL_AUTOMATON_PATH', 'skills.automaton'))
+    parser.add_argument('--feedback', action='store_true', help='Add LLM feedback (needs OPENAI_API_KEY)')
+    parser.add_argument('--feedback-rpm', type=int, default=60, help='LLM requests per minute')
+    parser.add_argument('--feedback-workers', type=int, default=4, help='Concurrent LLM requests')
+    args = parser.parse_args(argv)
+    if not args.input and not args.manifest:
+        parser.error('give --input and/or --manifest')
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    jobs = []
+    for label, path in zip(job_labels(args.job), args.job):
+        with open(path, encoding='utf-8') as f:
+            jobs.append((label, f.read()))
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+
+    api_key = None
+    if args.feedback:
+        from dotenv import load_dotenv
+        load_dotenv()
+        api_key = os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            parser.error('--feedback needs OPENAI_API_KEY')
+
+    stats = run(iter_inputs(args.input, args.manifest), jobs, args.output, fmt=fmt,
+                workers=args.workers, resume=args.resume, skill_automaton_path=args.skill_automaton,
+                feedback=args.feedback, feedback_rpm=args.feedback_rpm,
+                feedback_workers=args.feedback_workers, api_key=api_key)
+    print(f"Scored {stats['scored']}, failed {stats['failed']}, skipped {stats['skipped']} -> {args.output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
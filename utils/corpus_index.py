@@ -0,0 +1,109 @@
+import hashlib
+import math
+import sqlite3
+import threading
+
+
+class JobCorpusIndex:
+    """
+    Document-frequency index over job descriptions seen so far, stored in
+    SQLite so it survives restarts and can be shared between workers.
+
+    Adding a posting only touches the rows for its distinct terms, and IDF
+    lookups fetch all terms of a document in one query. The document count
+    is kept in a one-row table updated in the same transaction, so reading
+    it does not scan the documents.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+        # The index is often built at import time, e.g. in a gunicorn master
+        # that forks workers afterwards, so this connection is not kept: a
+        # SQLite connection must not be used across a fork.
+        conn = self._open()
+        try:
+            with conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS terms (term TEXT PRIMARY KEY, df INTEGER NOT NULL)")
+                conn.execute("CREATE TABLE IF NOT EXISTS documents (digest TEXT PRIMARY KEY)")
+                conn.execute("CREATE TABLE IF NOT EXISTS corpus_size "
+                             "(id INTEGER PRIMARY KEY CHECK (id = 0), documents INTEGER NOT NULL)")
+                # Indexes written before the counter existed are counted once
+                conn.execute("INSERT OR IGNORE INTO corpus_size (id, documents) "
+                             "SELECT 0, COUNT(*) FROM documents")
+        finally:
+            conn.close()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._open()
+        return conn
+
+    def add_document(self, text, keywords):
+        """
+        Add a job description to the index. Re-adding identical text is a no-op.
+        Args:
+            text (str): Job description text, used to detect duplicates.
+            keywords (iterable): Keywords extracted from the text.
+        Returns:
+            bool: True if the document was new.
+        """
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        conn = self._connect()
+        with conn:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO documents (digest) VALUES (?)", (digest,)
+            ).rowcount
+            if not inserted:
+                return False
+            conn.execute("UPDATE corpus_size SET documents = documents + 1 WHERE id = 0")
+            conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, 1)"
+                " ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                ((term,) for term in set(keywords))
+            )
+        return True
+
+    def document_count(self):
+        return self._connect().execute("SELECT documents FROM corpus_size WHERE id = 0").fetchone()[0]
+
+    def document_frequencies(self, terms):
+        """
+        Args:
+            terms (iterable): Terms to look up.
+        Returns:
+            dict: Term to document frequency; unseen terms are omitted.
+        """
+        terms = list(set(terms))
+        conn = self._connect()
+        frequencies = {}
+        # Stay under SQLite's default host-parameter limit
+        for start in range(0, len(terms), 900):
+            chunk = terms[start:start + 900]
+            placeholders = ','.join('?' * len(chunk))
+            frequencies.update(conn.execute(
+                f"SELECT term, df FROM terms WHERE term IN ({placeholders})", chunk
+            ).fetchall())
+        return frequencies
+
+    def idf(self, terms):
+        """
+        BM25 inverse document frequency for each term.
+        Args:
+            terms (iterable): Terms to weight.
+        Returns:
+            dict: Term to IDF weight.
+        """
+        terms = set(terms)
+        n = self.document_count()
+        df = self.document_frequencies(terms)
+        return {
+            term: math.log(1 + (n - df.get(term, 0) + 0.5) / (df.get(term, 0) + 0.5))
+            for term in terms
+        }
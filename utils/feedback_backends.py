@@ -0,0 +1,171 @@
+import threading
+import time
+
+from utils.keyword_matcher import compare_keywords
+
+# Response schema shared by every feedback backend. Also sent to the
+# provider in structured-output mode, so it sticks to the strict subset:
+# every property required and no additional properties.
+FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "match_score": {
+            "type": "integer",
+            "description": "0-100 alignment between the resume and the job description.",
+        },
+        "strengths": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "3-5 specific strengths from the resume.",
+        },
+        "weaknesses": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "3-5 specific weaknesses or gaps.",
+        },
+        "suggestions": {
+            "type": "array",
+            "items": {"type": "string"},
+            "description": "Exactly 3 specific improvement suggestions.",
+        },
+    },
+    "required": ["match_score", "strengths", "weaknesses", "suggestions"],
+    "additionalProperties": False,
+}
+
+
+def validate_feedback(feedback):
+    """
+    Check a feedback dict against FEEDBACK_SCHEMA.
+    Args:
+        feedback (dict): Backend output.
+    Returns:
+        list: Names of fields that are missing or of the wrong type.
+    """
+    if not isinstance(feedback, dict):
+        return list(FEEDBACK_SCHEMA['required'])
+    return [field for field in FEEDBACK_SCHEMA['required'] if not is_valid_field(field, feedback.get(field))]
+
+
+def is_valid_field(field, value):
+    """
+    Args:
+        field (str): Property name in FEEDBACK_SCHEMA.
+        value: Candidate value.
+    Returns:
+        bool: True if the value has the type the schema gives the field.
+    """
+    if FEEDBACK_SCHEMA['properties'][field]['type'] == 'integer':
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    return isinstance(value, list) and all(isinstance(item, str) for item in value)
+
+
+class RulesFeedbackBackend:
+    """
+    Deterministic, CPU-only feedback built from compare_keywords output.
+    Used offline, without an API key, or when the remote backend is
+    saturated or too slow. Results are cheap to rebuild, so they are not
+    cached.
+    """
+
+    name = 'rules'
+    local = True
+    cacheable = False
+
+    def generate(self, resume_text, job_description, keyword_result=None, api_key=None, on_update=None):
+        """
+        Args:
+            resume_text (str): Resume text.
+            job_description (str): Job description text.
+            keyword_result (dict): Optional precomputed compare_keywords output.
+        Returns:
+            tuple: (feedback dict, whether the result is safe to cache).
+        """
+        if keyword_result is None:
+            keyword_result = compare_keywords(resume_text, job_description)
+
+        matched = keyword_result.get('matched_skills') or keyword_result['matched_keywords']
+        missing = keyword_result.get('missing_skills') or keyword_result['missing_keywords']
+        score = keyword_result['match_score']
+        if keyword_result.get('matched_skills') or keyword_result.get('missing_skills'):
+            score = (score + keyword_result['skill_score']) / 2
+
+        strengths = [f"Mentions {term}, which the job description asks for" for term in matched[:5]]
+        weaknesses = [f"No mention of {term}" for term in missing[:5]]
+        suggestions = list(keyword_result.get('recommendations', []))[:3]
+        if missing and len(suggestions) < 3:
+            suggestions.append(f"Describe concrete work with {', '.join(missing[:3])} if you have it")
+        while len(suggestions) < 3:
+            suggestions.append("Quantify the impact of your most relevant projects")
+
+        feedback = {
+            "match_score": int(round(score)),
+            "strengths": strengths or ["Few of the job description's keywords appear in the resume"],
+            "weaknesses": weaknesses or ["No obvious keyword gaps against the job description"],
+            "suggestions": suggestions,
+        }
+        if on_update is not None:
+            on_update(feedback)
+        return feedback, self.cacheable
+
+
+class FeedbackRouter:
+    """
+    Picks a feedback backend per request.
+
+    The primary backend is used unless the remote queue is at least
+    max_queue_depth deep or its recent latency (an exponentially weighted
+    moving average) exceeds latency_budget seconds; then the fallback is
+    used. While over budget, one request per probe_interval still goes to
+    the primary so its latency estimate can recover.
+    Args:
+        primary (object): Preferred backend.
+        fallback (object): Backend for overflow and failures, or None.
+        latency_budget (float): Seconds; 0 or None disables the check.
+        max_queue_depth (int): In-flight remote calls; 0 or None disables it.
+        queue_depth (callable): Returns the current number of in-flight calls.
+        probe_interval (float): Seconds between probes of a slow primary.
+    """
+
+    def __init__(self, primary, fallback=None, latency_budget=None, max_queue_depth=None,
+                 queue_depth=None, probe_interval=30.0):
+        self.primary = primary
+        self.fallback = fallback
+        self.latency_budget = latency_budget
+        self.max_queue_depth = max_queue_depth
+        self.queue_depth = queue_depth
+        self.probe_interval = probe_interval
+        self._latency = {}
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+
+    def latency(self, backend):
+        with self._lock:
+            return self._latency.get(backend.name)
+
+    def record(self, backend, seconds, alpha=0.2):
+        """
+        Fold one observed generation time into the backend's latency estimate.
+        """
+        with self._lock:
+            previous = self._latency.get(backend.name)
+            self._latency[backend.name] = seconds if previous is None else alpha * seconds + (1 - alpha) * previous
+
+    def choose(self):
+        """
+        Returns:
+            object: Backend to use for the next request.
+        """
+        primary, fallback = self.primary, self.fallback
+        if fallback is None or primary.local:
+            return primary
+        if self.max_queue_depth and self.queue_depth is not None and self.queue_depth() >= self.max_queue_depth:
+            return fallback
+        latency = self.latency(primary)
+        if self.latency_budget and latency is not None and latency > self.latency_budget:
+            now = time.monotonic()
+            with self._lock:
+                if now - self._last_probe < self.probe_interval:
+                    return fallback
+                self._last_probe = now
+        return primary
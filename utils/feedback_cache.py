@@ -0,0 +1,186 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils.metrics import CACHE_REQUESTS
+
+
+def feedback_cache_key(model, prompt_template, resume_text, job_description, **params):
+    """
+    Build a cache key for an LLM feedback request.
+    Args:
+        model (str): Model name.
+        prompt_template (str): Unformatted prompt template.
+        resume_text (str): Truncated resume text sent to the model.
+        job_description (str): Truncated job description sent to the model.
+        **params: Sampling parameters such as max_tokens and temperature.
+    Returns:
+        str: Hex SHA-256 digest identifying the request.
+    """
+    payload = json.dumps({
+        'model': model,
+        'prompt_template': prompt_template,
+        'resume_text': resume_text,
+        'job_description': job_description,
+        'params': params,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class FeedbackCache:
+    """
+    TTL cache of parsed LLM feedback with in-flight request deduplication.
+
+    Entries live in a per-process LRU and, when db_path is set, in a SQLite
+    file shared across workers. Both tiers expire entries after ttl_seconds
+    and keep at most max_entries rows.
+    """
+
+    def __init__(self, db_path=None, ttl_seconds=7 * 24 * 3600, max_entries=10000):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated = 0
+        self._memory = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        if db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS feedback_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " feedback TEXT NOT NULL,"
+                    " created REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS feedback_cache_created"
+                    " ON feedback_cache (created)"
+                )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def get(self, key):
+        """
+        Look up unexpired feedback.
+        Args:
+            key (str): Key from feedback_cache_key().
+        Returns:
+            dict: Cached feedback, or None on a miss.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    return json.loads(entry[0])
+                del self._memory[key]
+
+        if self.db_path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT feedback, created FROM feedback_cache WHERE key = ? AND created >= ?",
+                    (key, now - self.ttl_seconds)
+                ).fetchone()
+            if row is not None:
+                self._put_memory(key, row[0], row[1])
+                return json.loads(row[0])
+        return None
+
+    def put(self, key, feedback):
+        """
+        Store parsed feedback.
+        Args:
+            key (str): Key from feedback_cache_key().
+            feedback (dict): Parsed feedback to cache.
+        """
+        serialized = json.dumps(feedback)
+        created = time.time()
+        self._put_memory(key, serialized, created)
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO feedback_cache (key, feedback, created) VALUES (?, ?, ?)",
+                    (key, serialized, created)
+                )
+                conn.execute(
+                    "DELETE FROM feedback_cache WHERE created < ?", (created - self.ttl_seconds,)
+                )
+                conn.execute(
+                    "DELETE FROM feedback_cache WHERE key IN ("
+                    " SELECT key FROM feedback_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def _put_memory(self, key, serialized, created):
+        with self._lock:
+            self._memory[key] = (serialized, created)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        Return cached feedback or compute it, sharing one computation between
+        concurrent callers with the same key.
+        Args:
+            key (str): Key from feedback_cache_key().
+            compute (callable): Returns (feedback, cacheable) on a miss.
+        Returns:
+            tuple: (feedback for the request, whether it is safe to cache).
+        """
+        feedback = self.get(key)
+        if feedback is not None:
+            with self._lock:
+                self.hits += 1
+            CACHE_REQUESTS.inc(cache='feedback', result='hit')
+            return feedback, True
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.deduplicated += 1
+
+        CACHE_REQUESTS.inc(cache='feedback', result='miss' if owner else 'deduplicated')
+        if not owner:
+            return future.result()
+
+        try:
+            feedback, cacheable = compute()
+            if cacheable:
+                self.put(key, feedback)
+            future.set_result((feedback, cacheable))
+            return feedback, cacheable
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit, miss and deduplication counters.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'deduplicated': self.deduplicated,
+                'memory_entries': len(self._memory),
+            }
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """
+    State of one queued analysis. Stages publish partial results with
+    update() so pollers can render keyword results before AI feedback.
+    """
+
+    def __init__(self, job_id):
+        self.id = job_id
+        self.status = 'queued'
+        self.keyword_result = None
+        self.feedback = None
+        self.error = None
+        self.created = time.time()
+        self.updated = self.created
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self.updated = time.time()
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'id': self.id,
+                'status': self.status,
+                'keyword_result': self.keyword_result,
+                'feedback': self.feedback,
+                'error': self.error,
+            }
+
+
+class InProcessJobQueue:
+    """
+    Job queue backed by a thread pool inside the web worker.
+
+    Job state only lives in this process, so run a single gunicorn worker
+    (scaling with --threads) or swap in an external backend exposing the
+    same submit()/get() interface.
+    """
+
+    def __init__(self, max_workers=4, max_jobs=1000):
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Enqueue func(job, *args, **kwargs) and return immediately.
+        Args:
+            func (callable): Pipeline to run; receives the Job as first argument.
+        Returns:
+            str: Id of the new job.
+        """
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job.id
+
+    @staticmethod
+    def _run(job, func, args, kwargs):
+        job.update(status='running')
+        try:
+            func(job, *args, **kwargs)
+            job.update(status='done')
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.update(status='failed', error=str(e))
+
+    def get(self, job_id):
+        """
+        Args:
+            job_id (str): Id returned by submit().
+        Returns:
+            dict: Snapshot of the job state, or None if unknown or expired.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.to_dict() if job is not None else None
+
+
+JOB_QUEUE_BACKENDS = {
+    'inprocess': InProcessJobQueue,
+}
+
+
+def create_job_queue(backend='inprocess', **kwargs):
+    """
+    Build a job queue by backend name.
+    Args:
+        backend (str): Key in JOB_QUEUE_BACKENDS.
+        **kwargs: Passed to the backend constructor.
+    Returns:
+        object: Queue exposing submit() and get().
+    """
+    try:
+        return JOB_QUEUE_BACKENDS[backend](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown job queue backend: {backend}")
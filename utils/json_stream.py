@@ -0,0 +1,162 @@
+import json
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+_SCALAR_CHARS = frozenset('-+.0123456789eEtruefalsn')
+_WHITESPACE = frozenset(' \t\r\n')
+
+
+class IncrementalJSONParser:
+    """
+    Single-pass, lenient parser for a JSON object arriving in chunks.
+
+    Text before the first '{' (chatter, markdown fences) and after the
+    matching '}' is ignored, as are stray characters between tokens. With
+    required_keys, a top-level object holding none of them (e.g. braces in
+    the chatter) is dropped as well and scanning resumes.
+    Every completed value is applied to the partially built object at once,
+    so callers can render array elements while the rest is still arriving.
+    Each character is looked at once; there is no backtracking.
+    Args:
+        required_keys (iterable): Optional keys the wanted object has.
+    """
+
+    def __init__(self, required_keys=()):
+        self.required_keys = frozenset(required_keys)
+        self.root = None
+        self.complete = False
+        self.skipped_prefix = False
+        self.skipped_suffix = False
+        self._stack = []  # [container, pending key or None, expecting key, path]
+        self._string = None
+        self._escape = None
+        self._scalar = []
+
+    def feed(self, chunk):
+        """
+        Args:
+            chunk (str): Next piece of the response.
+        Returns:
+            list: (path, value) for each scalar completed in this chunk, where
+                path is a tuple of object keys and array indices.
+        """
+        events = []
+        for ch in chunk:
+            if self.complete:
+                if ch not in _WHITESPACE and ch != '`':
+                    self.skipped_suffix = True
+                continue
+            if self._string is not None:
+                self._string_char(ch, events)
+            elif not self._stack:
+                if ch == '{':
+                    self.root = {}
+                    self._stack.append([self.root, None, True, ()])
+                elif ch not in _WHITESPACE:
+                    self.skipped_prefix = True
+            elif ch in _SCALAR_CHARS and not self._stack[-1][2]:
+                self._scalar.append(ch)
+            else:
+                self._flush_scalar(events)
+                self._structural(ch)
+                if self.complete and self.required_keys and self.required_keys.isdisjoint(self.root):
+                    # Not the object we are after; its events go with it
+                    self.root = None
+                    self.complete = False
+                    self.skipped_prefix = True
+                    events.clear()
+        return events
+
+    def close(self):
+        """
+        Finish parsing; a trailing number is kept, an unterminated string dropped.
+        Returns:
+            dict: The object parsed so far, or None if no object started.
+        """
+        if self._stack:
+            self._flush_scalar([])
+        return self.root
+
+    def _add_value(self, value, events=None):
+        """
+        Returns:
+            tuple: Path of the added value, or None if it had no key to go under.
+        """
+        container, key, _, parent_path = frame = self._stack[-1]
+        if isinstance(container, dict):
+            if key is None:
+                return None
+            path = parent_path + (key,)
+            container[key] = value
+            frame[1] = None
+            frame[2] = True
+        else:
+            path = parent_path + (len(container),)
+            container.append(value)
+        if events is not None:
+            events.append((path, value))
+        return path
+
+    def _structural(self, ch):
+        frame = self._stack[-1]
+        if ch == '"':
+            self._string = []
+        elif ch in '{[':
+            if frame[2]:
+                return
+            child = {} if ch == '{' else []
+            path = self._add_value(child)
+            if path is not None:
+                self._stack.append([child, None, ch == '{', path])
+        elif ch in '}]':
+            self._stack.pop()
+            if not self._stack:
+                self.complete = True
+        elif ch == ',' and isinstance(frame[0], dict):
+            frame[1] = None
+            frame[2] = True
+        elif ch == ':' and isinstance(frame[0], dict) and frame[1] is not None:
+            frame[2] = False
+
+    def _flush_scalar(self, events):
+        if not self._scalar:
+            return
+        text = ''.join(self._scalar)
+        self._scalar = []
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return
+        self._add_value(value, events)
+
+    def _string_char(self, ch, events):
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape[0] == 'u':
+                if len(self._escape) == 5:
+                    try:
+                        code = int(self._escape[1:], 16)
+                    except ValueError:
+                        code = None
+                    if code is not None and 0xDC00 <= code <= 0xDFFF and self._string \
+                            and 0xD800 <= ord(self._string[-1]) <= 0xDBFF:
+                        # Second half of a UTF-16 surrogate pair
+                        high = ord(self._string.pop())
+                        code = 0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)
+                    if code is not None:
+                        self._string.append(chr(code))
+                    self._escape = None
+            else:
+                self._string.append(_ESCAPES.get(ch, ch))
+                self._escape = None
+        elif ch == '\\':
+            self._escape = ''
+        elif ch == '"':
+            text = ''.join(self._string)
+            self._string = None
+            frame = self._stack[-1]
+            if isinstance(frame[0], dict) and frame[2]:
+                frame[1] = text
+            else:
+                self._add_value(text, events)
+        else:
+            self._string.append(ch)
@@ -1,57 +1,214 @@
+import hashlib
+import os
 import re
+import string
 from collections import Counter
 
+STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can',
+    'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
+    'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his', 'its', 'our', 'their',
+    'mine', 'yours', 'hers', 'ours', 'theirs', 'am', 'must', 'shall', 'cannot', 'cant'
+})
+
+# Common words that aren't useful for job matching
+COMMON_WORDS = frozenset({
+    'experience', 'work', 'job', 'position', 'role', 'team', 'company', 'business',
+    'project', 'development', 'management', 'support', 'service', 'system',
+    'technology', 'software', 'application', 'data', 'information', 'process',
+    'analysis', 'design', 'implementation', 'testing', 'deployment', 'maintenance',
+    'documentation', 'training', 'communication', 'collaboration', 'leadership',
+    'problem', 'solution', 'improvement', 'optimization', 'efficiency', 'quality',
+    'performance', 'security', 'reliability', 'scalability', 'integration',
+    'responsibility', 'duties', 'requirements', 'skills', 'knowledge', 'ability',
+    'years', 'month', 'day', 'time', 'period', 'duration', 'level',
+    'senior', 'junior', 'entry', 'mid', 'advanced', 'expert', 'beginner', 'intermediate'
+})
+
+# Tech terms whose punctuation is significant. They are kept as single
+# tokens and are exempt from the minimum length and stopword filters.
+PROTECTED_TERMS = frozenset({
+    'c++', 'c#', 'f#', '.net', 'asp.net', 'node.js', 'vue.js', 'react.js', 'next.js',
+    'express.js', 'd3.js', 'three.js', 'ci/cd', 'tcp/ip', 'pl/sql', 'ui/ux',
+    'objective-c', 'a/b', 'r&d'
+})
+
+def load_word_list(path):
+    """
+    Load a word list file with one entry per line; blank lines and lines
+    starting with # are ignored.
+    Args:
+        path (str): Path to the word list.
+    Returns:
+        frozenset: Lowercased entries.
+    """
+    with open(path, encoding='utf-8') as f:
+        return frozenset(
+            line.strip().lower() for line in f
+            if line.strip() and not line.lstrip().startswith('#')
+        )
+
+def _protected_term_key(term):
+    marks = [ch for ch in term if not ch.isalnum()]
+    for ch in '+#&/':
+        if ch in marks:
+            return ch
+    start = term.index(marks[0])
+    return term[start:start + 2]
+
+# Bump when a change to the tokenizer code changes its output
+TOKENIZER_VERSION = 3
+
+
+class KeywordTokenizer:
+    """
+    Keyword tokenizer with precompiled patterns and frozen filter sets.
+    Build it once and reuse it; DEFAULT_TOKENIZER is created at import.
+    """
+
+    def __init__(self, stop_words=STOP_WORDS, common_words=COMMON_WORDS,
+                 protected_terms=PROTECTED_TERMS, min_length=3):
+        self.excluded = frozenset(stop_words) | frozenset(common_words)
+        self.protected_terms = frozenset(term.lower() for term in protected_terms)
+        self.min_length = min_length
+
+        # Punctuated terms are swapped for placeholder words (longest first so
+        # "asp.net" wins over ".net") before punctuation is stripped, so the
+        # bulk of the text goes through a single translate() or sub() and split().
+        # They only match as whole tokens: "java/bash" holds no "a/b" and
+        # "company.network" no ".net". A slash may still separate them, as in
+        # "c#/.net", and a version may follow, as in "c++17" or "c++0x"; it
+        # is dropped so every version counts as the term. The pattern only runs when one of the terms' keys appears
+        # in the text: their rarest punctuation character, or for "." and "-"
+        # (common in prose) that character plus the next one, e.g. ".j" or "-c".
+        punctuated = sorted(
+            (t for t in self.protected_terms if not t.isalnum()), key=len, reverse=True
+        )
+        self._placeholders = {term: f'protectedterm{i}x' for i, term in enumerate(punctuated)}
+        self._protected_keys = frozenset(_protected_term_key(term) for term in punctuated)
+        self._protected_pattern = re.compile(
+            r'(?<![\w.+#&-])(' + '|'.join(map(re.escape, punctuated)) + r')'
+            r'(?:\d+(?:\.\d+)*[a-z]?)?(?![\w+#&-])'
+        ) if punctuated else None
+        self._non_word_pattern = re.compile(r'[^\w\s]')
+        self._ascii_punctuation = str.maketrans(
+            {ch: ' ' for ch in string.punctuation if ch != '_'}
+        )
+        self._alnum_protected = frozenset(t for t in self.protected_terms if t.isalnum())
+        # Identifies the tokenizer's output for caches of tokenized documents
+        config = '\n'.join([str(TOKENIZER_VERSION), str(min_length), *sorted(self.excluded), '',
+                             *sorted(self.protected_terms)])
+        self.fingerprint = hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def from_files(cls, stop_words_path=None, common_words_path=None,
+                   protected_terms_path=None, min_length=3):
+        """
+        Build a tokenizer from word list files, falling back to the built-in
+        lists for any path that is not given.
+        """
+        return cls(
+            stop_words=load_word_list(stop_words_path) if stop_words_path else STOP_WORDS,
+            common_words=load_word_list(common_words_path) if common_words_path else COMMON_WORDS,
+            protected_terms=load_word_list(protected_terms_path) if protected_terms_path else PROTECTED_TERMS,
+            min_length=min_length,
+        )
+
+    def _split(self, text):
+        text = text.lower()
+        placeholders = {}
+        if self._protected_pattern is not None and any(key in text for key in self._protected_keys):
+            def swap(match):
+                term = match.group(1)
+                placeholders[self._placeholders[term]] = term
+                return f' {self._placeholders[term]} '
+            text = self._protected_pattern.sub(swap, text)
+        # translate() matches [^\w\s] -> ' ' exactly for ASCII and is far faster
+        if text.isascii():
+            return text.translate(self._ascii_punctuation).split(), placeholders
+        return self._non_word_pattern.sub(' ', text).split(), placeholders
+
+    def words(self, text):
+        """
+        Split text into lowercase word tokens without any filtering, keeping
+        protected terms intact. Used by phrase matchers that need stopwords.
+        Args:
+            text (str): Input text.
+        Returns:
+            list: Word tokens in order of appearance.
+        """
+        words, placeholders = self._split(text)
+        if placeholders:
+            words = [placeholders.get(word, word) for word in words]
+        return words
+
+    def tokenize(self, text, min_length=None):
+        """
+        Args:
+            text (str): Input text.
+            min_length (int): Overrides the tokenizer's minimum keyword length.
+        Returns:
+            list: Keywords in order of appearance.
+        """
+        if min_length is None:
+            min_length = self.min_length
+        words, placeholders = self._split(text)
+
+        # Decide once per distinct word, then keep tokens with a set lookup
+        distinct = set(words)
+        keep = {
+            word for word in distinct - self.excluded
+            if len(word) >= min_length and not word.isdigit()
+        }
+        if self._alnum_protected:
+            keep |= distinct & self._alnum_protected
+        keywords = [word for word in words if word in keep]
+        if placeholders:
+            keywords = [placeholders.get(word, word) for word in keywords]
+        return keywords
+
+    def iter_keywords(self, text, min_length=None):
+        """
+        Yield keywords from text one line at a time, so large documents are
+        never tokenized into a single list.
+        Args:
+            text (str): Input text.
+            min_length (int): Overrides the tokenizer's minimum keyword length.
+        Yields:
+            str: Keyword.
+        """
+        for line in text.splitlines():
+            yield from self.tokenize(line, min_length)
+
+    def iter_corpus(self, texts, min_length=None):
+        """
+        Stream keywords from an iterable of documents without materializing
+        the whole corpus.
+        Yields:
+            list: Keywords for each document.
+        """
+        for text in texts:
+            yield self.tokenize(text, min_length)
+
+# Word lists can be overridden without code changes via these env vars
+DEFAULT_TOKENIZER = KeywordTokenizer.from_files(
+    stop_words_path=os.getenv('KEYWORD_STOP_WORDS_FILE'),
+    common_words_path=os.getenv('KEYWORD_COMMON_WORDS_FILE'),
+    protected_terms_path=os.getenv('KEYWORD_PROTECTED_TERMS_FILE'),
+)
+
 def extract_keywords(text, min_length=3):
     """
-    Extract meaningful keywords from text using basic Python.
+    Extract meaningful keywords from text using the default tokenizer.
     Args:
         text (str): Input text to extract keywords from.
         min_length (int): Minimum length for keywords.
     Returns:
         list: List of keywords.
     """
-    # Convert to lowercase and remove punctuation
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    
-    # Split into words
-    words = text.split()
-    
-    # Remove stopwords and short words
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-        'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being', 'have', 'has', 'had',
-        'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'can',
-        'this', 'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they',
-        'me', 'him', 'her', 'us', 'them', 'my', 'your', 'his', 'her', 'its', 'our', 'their',
-        'mine', 'yours', 'hers', 'ours', 'theirs', 'am', 'is', 'are', 'was', 'were',
-        'been', 'being', 'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would',
-        'could', 'should', 'may', 'might', 'must', 'shall', 'can', 'cannot', 'cant'
-    }
-    
-    # Remove common words that aren't useful for job matching
-    common_words = {
-        'experience', 'work', 'job', 'position', 'role', 'team', 'company', 'business',
-        'project', 'development', 'management', 'support', 'service', 'system',
-        'technology', 'software', 'application', 'data', 'information', 'process',
-        'analysis', 'design', 'implementation', 'testing', 'deployment', 'maintenance',
-        'documentation', 'training', 'communication', 'collaboration', 'leadership',
-        'problem', 'solution', 'improvement', 'optimization', 'efficiency', 'quality',
-        'performance', 'security', 'reliability', 'scalability', 'integration',
-        'responsibility', 'duties', 'requirements', 'skills', 'knowledge', 'ability',
-        'experience', 'years', 'month', 'day', 'time', 'period', 'duration', 'level',
-        'senior', 'junior', 'entry', 'mid', 'advanced', 'expert', 'beginner', 'intermediate'
-    }
-    
-    keywords = []
-    for word in words:
-        if (len(word) >= min_length and 
-            word not in stop_words and 
-            word not in common_words and
-            not word.isdigit()):
-            keywords.append(word)
-    
-    return keywords
+    return DEFAULT_TOKENIZER.tokenize(text, min_length)
 
 def get_keyword_frequency(keywords):
     """
@@ -63,42 +220,63 @@ def get_keyword_frequency(keywords):
     """
     return Counter(keywords)
 
-def compare_keywords(resume_text, job_description):
+def bm25_term_weights(job_freq, idf, k1=1.2):
     """
-    Compares keywords between resume text and job description.
+    Weight job description terms by IDF with BM25 term-frequency saturation.
     Args:
-        resume_text (str): Extracted resume text.
-        job_description (str): Job description text.
+        job_freq (Counter): Keyword frequencies of the job description.
+        idf (dict): Term to IDF weight, e.g. from JobCorpusIndex.idf().
+        k1 (float): BM25 saturation parameter.
     Returns:
-        dict: Analysis with matched and missing keywords, scores, and recommendations.
+        dict: Term to weight.
     """
-    # Extract keywords from both texts
-    resume_keywords = extract_keywords(resume_text)
-    job_keywords = extract_keywords(job_description)
-    
-    # Get keyword frequencies
-    resume_freq = get_keyword_frequency(resume_keywords)
-    job_freq = get_keyword_frequency(job_keywords)
-    
-    # Find matched keywords (keywords that appear in both)
-    matched_keywords = list(set(resume_keywords) & set(job_keywords))
-    
-    # Find missing keywords (keywords in job description but not in resume)
-    missing_keywords = list(set(job_keywords) - set(resume_keywords))
-    
-    # Find extra keywords (keywords in resume but not in job description)
-    extra_keywords = list(set(resume_keywords) - set(job_keywords))
-    
-    # Calculate match score
-    total_job_keywords = len(set(job_keywords))
-    if total_job_keywords > 0:
-        match_score = (len(matched_keywords) / total_job_keywords) * 100
+    terms = list(job_freq)
+    tfs = [job_freq[term] for term in terms]
+    idfs = map(idf.__getitem__, terms)
+    return dict(zip(terms, map(lambda w, tf: w * tf * (k1 + 1) / (tf + k1), idfs, tfs)))
+
+def score_match(job_freq, matched_keywords, scoring='overlap', corpus_index=None):
+    """
+    Score how much of the job description the matched keywords cover.
+    Args:
+        job_freq (Counter): Keyword frequencies of the job description.
+        matched_keywords (collection): Job keywords that the resume contains.
+        scoring (str): 'overlap' or 'bm25', as in compare_keywords().
+        corpus_index (JobCorpusIndex): Required for 'bm25' scoring.
+    Returns:
+        tuple: (match score from 0 to 100, term weights used to rank missing
+            keywords).
+    """
+    total_job_keywords = len(job_freq)
+    if scoring == 'bm25':
+        if corpus_index is None:
+            raise ValueError("bm25 scoring requires a corpus_index")
+        weights = bm25_term_weights(job_freq, corpus_index.idf(set(job_freq)))
+        total_weight = sum(weights.values())
+        matched_weight = sum(map(weights.__getitem__, matched_keywords))
+        match_score = (matched_weight / total_weight) * 100 if total_weight > 0 else 0
+    elif scoring == 'overlap':
+        weights = job_freq
+        if total_job_keywords > 0:
+            match_score = (len(matched_keywords) / total_job_keywords) * 100
+        else:
+            match_score = 0
     else:
-        match_score = 0
+        raise ValueError(f"Unknown scoring mode: {scoring}")
+    return match_score, weights
+
+def summarize_match(resume_freq, job_freq, matched_keywords, missing_keywords,
+                    extra_keywords, match_score, weights, scoring):
+    """
+    Build the compare_keywords() result from already computed keyword sets.
+    Returns:
+        dict: Analysis with matched and missing keywords, scores, and recommendations.
+    """
+    missing_keywords = list(missing_keywords)
     
-    # Get top missing keywords (most frequent in job description)
+    # Get top missing keywords (most important in job description)
     top_missing = sorted(
-        [(word, job_freq[word]) for word in missing_keywords],
+        [(word, weights[word]) for word in missing_keywords],
         key=lambda x: x[1],
         reverse=True
     )[:10]  # Top 10 missing keywords
@@ -112,16 +290,67 @@ def compare_keywords(resume_text, job_description):
     
     return {
         'match_score': round(match_score, 1),
+        'scoring': scoring,
         'matched_keywords': [word for word, _ in top_matched],
         'missing_keywords': [word for word, _ in top_missing],
-        'extra_keywords': extra_keywords[:10],  # Top 10 extra keywords
-        'total_job_keywords': total_job_keywords,
-        'total_resume_keywords': len(set(resume_keywords)),
+        'extra_keywords': list(extra_keywords)[:10],  # Top 10 extra keywords
+        'total_job_keywords': len(job_freq),
+        'total_resume_keywords': len(resume_freq),
         'matched_count': len(matched_keywords),
         'missing_count': len(missing_keywords),
         'recommendations': generate_recommendations(match_score, missing_keywords[:5])
     }
 
+def compare_keywords(resume_text, job_description, resume_freq=None,
+                     scoring='overlap', corpus_index=None, job_freq=None,
+                     skill_matcher=None, resume_document=None):
+    """
+    Compares keywords between resume text and job description.
+    Args:
+        resume_text (str): Extracted resume text.
+        job_description (str): Job description text.
+        resume_freq (Counter): Optional precomputed keyword frequencies for the
+            resume, e.g. from the resume cache. Skips re-tokenizing resume_text.
+        scoring (str): 'overlap' counts every job keyword equally; 'bm25'
+            weights them by IDF over corpus_index and term frequency.
+        corpus_index (JobCorpusIndex): Required for 'bm25' scoring.
+        job_freq (Counter): Optional precomputed keyword frequencies for the
+            job description.
+        skill_matcher (SkillMatcher): Optional multi-word skill matcher; adds
+            matched_skills, missing_skills and skill_score to the result.
+        resume_document (ResumeDocument): Optional parsed resume; its memoized
+            keyword frequencies and words are reused instead of re-scanning.
+    Returns:
+        dict: Analysis with matched and missing keywords, scores, and recommendations.
+    """
+    # Extract keywords and frequencies from both texts
+    if resume_freq is None and resume_document is not None:
+        resume_freq = resume_document.keyword_frequency()
+    if resume_freq is None:
+        resume_freq = get_keyword_frequency(extract_keywords(resume_text))
+    if job_freq is None:
+        job_freq = get_keyword_frequency(extract_keywords(job_description))
+    
+    resume_set = set(resume_freq)
+    job_set = set(job_freq)
+    
+    # Find matched keywords (keywords that appear in both)
+    matched_keywords = list(resume_set & job_set)
+    
+    # Find missing keywords (keywords in job description but not in resume)
+    missing_keywords = list(job_set - resume_set)
+    
+    # Find extra keywords (keywords in resume but not in job description)
+    extra_keywords = list(resume_set - job_set)
+    
+    match_score, weights = score_match(job_freq, matched_keywords, scoring, corpus_index)
+    result = summarize_match(resume_freq, job_freq, matched_keywords, missing_keywords,
+                             extra_keywords, match_score, weights, scoring)
+    if skill_matcher is not None:
+        resume_words = resume_document.words() if resume_document is not None else None
+        result.update(skill_matcher.compare(resume_text, job_description, resume_words))
+    return result
+
 def generate_recommendations(match_score, top_missing_keywords):
     """
     Generate recommendations based on match score and missing keywords.
@@ -0,0 +1,214 @@
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from functools import lru_cache
+
+from utils.metrics import LLM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def transient_errors():
+    """
+    Errors worth another attempt: dropped connections and timeouts, 429s
+    and 5xx. The openai package is only imported once a call is made, so
+    workers that never reach the LLM do not pay for it at start-up.
+    Returns:
+        tuple: Exception classes to retry.
+    """
+    import openai
+    return (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+
+
+@lru_cache(maxsize=None)
+def stream_errors():
+    """
+    Errors that cut a response stream short. Once the stream is open, the
+    openai package no longer wraps httpx, so read timeouts and broken
+    connections arrive as raw httpx errors.
+    Returns:
+        tuple: Exception classes that end a stream early.
+    """
+    import httpx
+    return transient_errors() + (httpx.HTTPError,)
+
+
+class LLMUnavailable(Exception):
+    """
+    Raised when no upstream call could be made: every slot is busy or the
+    transient-error retries ran out. Callers fall back to keyword-only results.
+    """
+
+
+class LLMClient:
+    """
+    Long-lived OpenAI client shared by every request in the process.
+
+    One openai.OpenAI instance is kept per API key so its HTTP connection
+    pool (and TLS sessions) are reused across calls. A semaphore caps the
+    number of concurrent upstream calls; when all slots stay busy for
+    acquire_timeout seconds the call fails fast with LLMUnavailable instead
+    of queueing behind the rate limit.
+    Args:
+        timeout (float): Read timeout per attempt, in seconds.
+        connect_timeout (float): Connect timeout per attempt, in seconds.
+        max_retries (int): Extra attempts after a transient error.
+        backoff_base (float): First backoff ceiling; doubles every attempt.
+        backoff_max (float): Upper bound for a single backoff sleep.
+        max_concurrency (int): Concurrent upstream calls per process.
+        acquire_timeout (float): Seconds to wait for a free slot.
+    """
+
+    def __init__(self, timeout=60.0, connect_timeout=5.0, max_retries=3, backoff_base=0.5,
+                 backoff_max=8.0, max_concurrency=8, acquire_timeout=0.0):
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self._reset()
+        _instances.add(self)
+
+    def _reset(self):
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._in_flight = 0
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, api_key):
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                import openai
+
+                # Retries are handled here so they share the concurrency slot
+                client = openai.OpenAI(
+                    api_key=api_key,
+                    timeout=openai.Timeout(self.timeout, connect=self.connect_timeout),
+                    max_retries=0,
+                )
+                self._clients[api_key] = client
+            return client
+
+    def _backoff(self, attempt, error):
+        """
+        Seconds to sleep before the next attempt: the server's Retry-After
+        when it sent one, otherwise exponential backoff with full jitter.
+        """
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return min(self.backoff_max, float(retry_after))
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _create(self, client, params):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = client.chat.completions.create(**params)
+                LLM_REQUESTS.inc(outcome='ok')
+                return response
+            except transient_errors() as e:
+                if attempt == self.max_retries:
+                    LLM_REQUESTS.inc(outcome='failed')
+                    raise LLMUnavailable(f"OpenAI request failed after {attempt + 1} attempts: {e}") from e
+                delay = self._backoff(attempt, e)
+                LLM_REQUESTS.inc(outcome='retry')
+                logger.warning("Transient OpenAI error (%s), retrying in %.2fs", type(e).__name__, delay)
+                time.sleep(delay)
+
+    def _acquire(self):
+        timeout = self.acquire_timeout if self.acquire_timeout > 0 else None
+        if not self._slots.acquire(blocking=self.acquire_timeout > 0, timeout=timeout):
+            LLM_REQUESTS.inc(outcome='saturated')
+            raise LLMUnavailable(f"All {self.max_concurrency} LLM slots are busy")
+        with self._lock:
+            self._in_flight += 1
+
+    def _release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    @property
+    def in_flight(self):
+        """
+        Returns:
+            int: Upstream calls currently holding a slot.
+        """
+        return self._in_flight
+
+    def chat_completion(self, api_key, **params):
+        """
+        Create a chat completion, retrying transient errors.
+        Args:
+            api_key (str): OpenAI API key.
+            **params: Passed to client.chat.completions.create().
+        Returns:
+            object: The completion response.
+        Raises:
+            LLMUnavailable: No free slot, or every attempt hit a transient error.
+        """
+        self._acquire()
+        try:
+            return self._create(self._client(api_key), params)
+        finally:
+            self._release()
+
+    def stream_chat_completion(self, api_key, **params):
+        """
+        Stream a chat completion, yielding content deltas as they arrive.
+        The concurrency slot is held until the stream ends. Transient errors
+        are retried while opening the stream; once it is open an error just
+        ends it early and the caller sees truncated content.
+        Args:
+            api_key (str): OpenAI API key.
+            **params: Passed to client.chat.completions.create().
+        Yields:
+            str: Content deltas.
+        Raises:
+            LLMUnavailable: No free slot, or every attempt hit a transient error.
+        """
+        self._acquire()
+        try:
+            stream = self._create(self._client(api_key), dict(params, stream=True))
+            try:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            except stream_errors() as e:
+                logger.warning("OpenAI stream interrupted (%s)", type(e).__name__)
+            finally:
+                stream.close()
+        finally:
+            self._release()
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+# A process forked from one that already used a client (e.g. a gunicorn
+# worker under preload_app) must not reuse the parent's HTTP connections, or
+# its slots and locks, which may be held by threads that did not survive the
+# fork. The child starts every client afresh instead.
+_instances = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for client in list(_instances):
+        client._reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -1,200 +1,361 @@
-import openai
-import json
+import logging
+import time
 
-def get_resume_feedback(resume_text, job_description, api_key):
+from utils.feedback_backends import (FEEDBACK_SCHEMA, FeedbackRouter, RulesFeedbackBackend, is_valid_field,
+                                     validate_feedback)
+from utils.feedback_cache import FeedbackCache, feedback_cache_key
+from utils.llm_client import LLMClient, LLMUnavailable
+from utils.prompt_builder import PromptBuilder
+from utils.json_stream import IncrementalJSONParser
+from utils.metrics import timed, JSON_REPAIR, STAGE_LATENCY
+
+logger = logging.getLogger(__name__)
+
+MODEL = 'gpt-4'  # GPT-4 for better JSON compliance
+MAX_TOKENS = 2000
+TEMPERATURE = 0.1  # Lower temperature for more consistent formatting
+
+SYSTEM_PROMPT = "You are a JSON-only response assistant. You must respond with valid JSON only, no other text."
+
+# Kept short: it is resent with every call. The resume and job description
+# are fitted to token budgets by prompt_builder before formatting.
+PROMPT_TEMPLATE = (
+    "You are a professional resume reviewer. Compare the resume with the job description.\n"
+    "Score 0-100: 90+ excellent, 80-89 very good, 70-79 good, 60-69 fair, 50-59 poor, below 50 very poor match.\n"
+    "Respond with only a JSON object with exactly these keys: "
+    "match_score (number 0-100), strengths (3-5 specific strings), "
+    "weaknesses (3-5 specific gaps), suggestions (exactly 3 specific improvements). "
+    "No markdown or text outside the JSON.\n"
+    "\n"
+    "Resume:\n{resume_text}\n\n"
+    "Job Description:\n{job_description}\n"
+)
+
+# Parsed feedback shared across requests in this process. Call
+# configure_feedback_cache() to add a persistent SQLite tier.
+feedback_cache = FeedbackCache()
+
+
+def configure_feedback_cache(db_path=None, ttl_seconds=7 * 24 * 3600, max_entries=10000):
+    """
+    Replace the module feedback cache with one using the given settings.
+    Args:
+        db_path (str): Optional SQLite file for a persistent, cross-worker tier.
+        ttl_seconds (int): How long cached feedback stays valid.
+        max_entries (int): Maximum number of cached responses per tier.
+    """
+    global feedback_cache
+    feedback_cache = FeedbackCache(db_path=db_path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+# Pooled upstream client shared across requests in this process. Call
+# configure_llm_client() to change timeouts, retries or the concurrency cap.
+llm_client = LLMClient()
+
+
+def configure_llm_client(**settings):
+    """
+    Replace the module LLM client with one using the given settings.
+    Args:
+        **settings: Passed to LLMClient (timeout, max_retries, max_concurrency, ...).
+    """
+    global llm_client
+    previous, llm_client = llm_client, LLMClient(**settings)
+    previous.close()
+
+
+# Token budgets for the resume and job description parts of the prompt
+prompt_builder = PromptBuilder(model=MODEL)
+
+
+def configure_prompt_builder(resume_tokens=900, job_tokens=600):
+    """
+    Replace the module prompt builder with one using the given budgets.
+    Args:
+        resume_tokens (int): Token budget for the resume.
+        job_tokens (int): Token budget for the job description.
     """
-    Sends resume and job description to OpenAI API and returns feedback.
+    global prompt_builder
+    prompt_builder = PromptBuilder(resume_tokens=resume_tokens, job_tokens=job_tokens, model=MODEL)
+
+
+class OpenAIFeedbackBackend:
+    """
+    Remote feedback from the OpenAI chat API, streamed through the
+    incremental JSON parser.
+    Args:
+        model (str): Chat model name.
+        structured_output (bool): Ask the provider to constrain the output to
+            FEEDBACK_SCHEMA (json_schema response format) so it never needs
+            repair. Requires a model that supports structured outputs.
+    """
+
+    local = False
+    cacheable = True
+
+    def __init__(self, model=MODEL, structured_output=False):
+        self.model = model
+        self.structured_output = structured_output
+        self.name = 'openai_schema' if structured_output else 'openai'
+
+    def generate(self, resume_text, job_description, keyword_result=None, api_key=None, on_update=None):
+        """
+        Args:
+            resume_text (str): Packed resume text.
+            job_description (str): Budgeted job description text.
+            api_key (str): OpenAI API key.
+            on_update (callable): Optional; receives partial feedback.
+        Returns:
+            tuple: (feedback dict, whether the result is safe to cache).
+        """
+        params = {}
+        if self.structured_output:
+            params['response_format'] = {
+                "type": "json_schema",
+                "json_schema": {"name": "resume_feedback", "strict": True, "schema": FEEDBACK_SCHEMA},
+            }
+        return _request_feedback(resume_text, job_description, api_key, on_update,
+                                 model=self.model, **params)
+
+
+FEEDBACK_BACKENDS = {
+    'openai': lambda **kwargs: OpenAIFeedbackBackend(**kwargs),
+    'openai_schema': lambda **kwargs: OpenAIFeedbackBackend(structured_output=True, **kwargs),
+    'rules': lambda **kwargs: RulesFeedbackBackend(),
+}
+
+
+def create_feedback_backend(backend='openai', **kwargs):
+    """
+    Build a feedback backend by name.
+    Args:
+        backend (str): Key in FEEDBACK_BACKENDS.
+        **kwargs: Passed to the backend constructor, e.g. model.
+    Returns:
+        object: Backend exposing generate().
+    """
+    try:
+        return FEEDBACK_BACKENDS[backend](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown feedback backend: {backend}")
+
+
+# Backend selection for get_resume_feedback. The remote queue depth is read
+# from whichever LLM client is current.
+feedback_router = FeedbackRouter(
+    create_feedback_backend('openai'), fallback=RulesFeedbackBackend(),
+    queue_depth=lambda: llm_client.in_flight,
+)
+
+
+def configure_feedback_backends(primary='openai', fallback='rules', model=None,
+                                latency_budget=None, max_queue_depth=None):
+    """
+    Replace the module feedback router.
+    Args:
+        primary (str): Backend name for normal traffic.
+        fallback (str): Backend name for overflow and remote failures, or
+            None to return no feedback in those cases.
+        model (str): Model for OpenAI backends; defaults to MODEL.
+        latency_budget (float): Route to the fallback while the primary's
+            recent latency exceeds this many seconds.
+        max_queue_depth (int): Route to the fallback while this many remote
+            calls are in flight.
+    """
+    global feedback_router
+    options = {'model': model} if model else {}
+    feedback_router = FeedbackRouter(
+        create_feedback_backend(primary, **options),
+        fallback=create_feedback_backend(fallback) if fallback else None,
+        latency_budget=latency_budget,
+        max_queue_depth=max_queue_depth,
+        queue_depth=lambda: llm_client.in_flight,
+    )
+
+
+def get_resume_feedback(resume_text, job_description, api_key, keyword_result=None, on_update=None,
+                        document=None):
+    """
+    Returns feedback on a resume from the backend the router picks.
+    Remote responses are streamed and parsed incrementally. Identical
+    requests are answered from the feedback cache, and concurrent identical
+    requests share a single upstream call. If the remote backend is
+    saturated or unreachable, or no API key is set, the fallback backend
+    answers instead.
     Args:
         resume_text (str): Extracted resume text.
         job_description (str): Job description text.
         api_key (str): OpenAI API key.
+        keyword_result (dict): Optional compare_keywords output; ranks which
+            resume sections are kept when the resume is over its token budget
+            and feeds the rules backend.
+        on_update (callable): Optional; receives partial feedback while the
+            response streams in, and None to withdraw it if the remote call
+            then fails. Not called for cached results.
+        document (ResumeDocument): Optional parsed resume reused for packing.
     Returns:
-        dict: Feedback with match score, strengths, weaknesses, suggestions.
+        dict: Feedback matching FEEDBACK_SCHEMA plus a 'source' naming the
+            backend and 'cacheable', False for placeholder or locally
+            rebuilt results that must not be stored; or None when no backend
+            could answer and the caller should show keyword results only.
+    """
+    router = feedback_router
+    backend = router.choose()
+    if not backend.local and not api_key:
+        # The openai client refuses to start without a key
+        if router.fallback is None or not router.fallback.local:
+            logger.warning("No OpenAI API key configured, returning keyword results only")
+            return None
+        backend = router.fallback
+    if backend.local:
+        feedback, cacheable = backend.generate(resume_text, job_description, keyword_result, api_key, on_update)
+        return dict(feedback, source=backend.name, cacheable=cacheable)
+
+    with timed('prompt_packing'):
+        packed_resume = prompt_builder.pack_resume(resume_text, job_description, keyword_result, document)
+        packed_job = prompt_builder.fit_job(job_description)
+    if len(packed_resume) < len(resume_text):
+        logger.debug("Resume packed from %d to %d characters", len(resume_text), len(packed_resume))
+
+    def compute():
+        start = time.perf_counter()
+        try:
+            return backend.generate(packed_resume, packed_job, keyword_result, api_key, on_update)
+        finally:
+            router.record(backend, time.perf_counter() - start)
+
+    key = feedback_cache_key(backend.model, PROMPT_TEMPLATE, packed_resume, packed_job,
+                             max_tokens=MAX_TOKENS, temperature=TEMPERATURE, backend=backend.name)
+    try:
+        feedback, cacheable = feedback_cache.get_or_compute(key, compute)
+        return dict(feedback, source=backend.name, cacheable=cacheable)
+    except LLMUnavailable as e:
+        if on_update is not None:
+            # Withdraw partial feedback already streamed from the failed call
+            on_update(None)
+        if router.fallback is None:
+            logger.warning("AI feedback unavailable, returning keyword results only: %s", e)
+            return None
+        logger.warning("AI feedback unavailable, using the %s backend: %s", router.fallback.name, e)
+        feedback, cacheable = router.fallback.generate(resume_text, job_description, keyword_result, api_key,
+                                                       on_update)
+        return dict(feedback, source=router.fallback.name, cacheable=cacheable)
+    except Exception:
+        if on_update is not None:
+            on_update(None)
+        raise
+
+
+def _request_feedback(resume_text, job_description, api_key, on_update=None, model=MODEL, **params):
+    """
+    Streams the upstream OpenAI call through the incremental JSON parser.
+    Args:
+        resume_text (str): Packed resume text.
+        job_description (str): Budgeted job description text.
+        api_key (str): OpenAI API key.
+        on_update (callable): Optional; called with a snapshot of the partial
+            feedback each time a score or list element completes.
+        model (str): Chat model name.
+        **params: Extra request parameters, e.g. response_format.
+    Returns:
+        tuple: (feedback dict, whether the result is safe to cache).
     """
-    
-    max_resume_chars = 3000  # Limit resume text
-    max_job_chars = 2500     # Limit job description
-    
-    if len(resume_text) > max_resume_chars:
-        resume_text = resume_text[:max_resume_chars] + "..."
-        print(f"Resume text truncated to {max_resume_chars} characters")
-    
-    if len(job_description) > max_job_chars:
-        job_description = job_description[:max_job_chars] + "..."
-        print(f"Job description truncated to {max_job_chars} characters")
-    
-    openai.api_key = api_key
-
-    prompt = (
-        "You are a professional resume reviewer. You MUST respond with valid JSON only.\n"
-        "Given the following resume and job description, provide a detailed analysis and feedback on the resume.\n"
-        "\n"
-        "SCORING CRITERIA:\n"
-        "- 90-100: Excellent match - resume perfectly aligns with job requirements\n"
-        "- 80-89: Very good match - resume strongly matches job requirements\n"
-        "- 70-79: Good match - resume generally matches job requirements\n"
-        "- 60-69: Fair match - resume partially matches job requirements\n"
-        "- 50-59: Poor match - resume has limited alignment with job requirements\n"
-        "- 0-49: Very poor match - resume does not align with job requirements\n"
-        "\n"
-        "Your response must be a valid JSON object with exactly these keys:\n"
-        "- match_score (number 0-100, based on alignment between resume and job description)\n"
-        "- strengths (array of 3-5 specific strengths from the resume)\n"
-        "- weaknesses (array of 3-5 specific weaknesses or gaps)\n"
-        "- suggestions (array of exactly 3 specific improvement suggestions)\n"
-        "\n"
-        "CRITICAL: Your response must be valid JSON. Do not include any text before or after the JSON object.\n"
-        "Do not use markdown formatting, code blocks, or any other formatting.\n"
-        "Start your response with {{ and end with }} only.\n"
-        "\n"
-        "Example response format (copy this exact structure):\n"
-        '{{\n'
-        '  "match_score": 75,\n'
-        '  "strengths": ["Strong Python programming skills", "Relevant Flask framework experience", "Database management expertise"],\n'
-        '  "weaknesses": ["Missing cloud platform experience", "Limited team leadership examples", "No mention of API development"],\n'
-        '  "suggestions": ["Add AWS or Azure cloud experience", "Include leadership and team collaboration examples", "Highlight API development and integration work"]\n'
-        '}}\n'
-        "\n"
-        "Resume:\n{resume_text}\n\n"
-        "Job Description:\n{job_description}\n"
-        "\n"
-        "IMPORTANT: Respond with ONLY the JSON object, no additional text, explanations, or markdown formatting."
-    )
-    
     # Format the prompt with actual data
-    formatted_prompt = prompt.format(resume_text=resume_text, job_description=job_description)
+    formatted_prompt = PROMPT_TEMPLATE.format(resume_text=resume_text, job_description=job_description)
     
-    print(f"=== PROMPT DEBUG ===")
-    print(f"Formatted prompt length: {len(formatted_prompt)}")
-    print(f"Prompt preview (first 500 chars): {formatted_prompt[:500]}...")
-    print(f"Prompt preview (last 200 chars): ...{formatted_prompt[-200:]}")
-    print(f"=== END PROMPT DEBUG ===")
+    logger.debug("Formatted prompt length: %d", len(formatted_prompt))
     
-    client = openai.OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model='gpt-4',  # Try GPT-4 for better JSON compliance
-        messages=[
-            {"role": 'system', "content": "You are a JSON-only response assistant. You must respond with valid JSON only, no other text."},
-            {"role": 'user', "content": formatted_prompt}
-        ],
-        max_tokens=2000,
-        temperature=0.1,  # Lower temperature for more consistent formatting
-    )
+    parser = IncrementalJSONParser(FEEDBACK_SCHEMA['required'])
+    received = 0
+    first_element = None
+    start = time.perf_counter()
+    with timed('llm_call'):
+        deltas = llm_client.stream_chat_completion(
+            api_key,
+            model=model,
+            messages=[
+                {"role": 'system', "content": SYSTEM_PROMPT},
+                {"role": 'user', "content": formatted_prompt}
+            ],
+            max_tokens=MAX_TOKENS,
+            temperature=TEMPERATURE,
+            **params
+        )
+        for delta in deltas:
+            received += len(delta)
+            if parser.feed(delta):
+                if first_element is None:
+                    first_element = time.perf_counter() - start
+                    STAGE_LATENCY.observe(first_element, stage='llm_first_element')
+                snapshot = _snapshot(parser.root) if on_update is not None else None
+                if snapshot:
+                    on_update(snapshot)
 
-    try:
-        content = response.choices[0].message.content
-        if content is None:
-            raise ValueError("OpenAI response content is None")
-        
-        # Debug: print what we received
-        print(f"OpenAI Response: {content}")
-        print(f"Response length: {len(content)}")
-        print(f"Response starts with: {content[:100]}")
-        
-        # Try to clean the response if it has extra text
-        content = content.strip()
-        
-        # Remove markdown code blocks
-        if content.startswith('```json'):
-            content = content[7:]
-        elif content.startswith('```'):
-            content = content[3:]
-        if content.endswith('```'):
-            content = content[:-3]
-        content = content.strip()
-        
-        print(f"Cleaned content: {content}")
-        
-        # Try to parse JSON with better error handling
-        try:
-            feedback = json.loads(content)
-        except json.JSONDecodeError as json_error:
-            print(f"JSON parsing failed: {json_error}")
-            print(f"Attempting to fix malformed JSON...")
-            
-            # Try to extract JSON from the response
-            import re
-            
-            # Method 1: Look for JSON-like structure with braces
-            json_match = re.search(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL)
-            if json_match:
-                try:
-                    feedback = json.loads(json_match.group())
-                    print("Successfully extracted JSON from response using method 1")
-                except:
-                    pass
-            
-            # Method 2: If method 1 failed, try to find the last JSON-like structure
-            if 'feedback' not in locals() or not isinstance(feedback, dict):
-                json_matches = re.findall(r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}', content, re.DOTALL)
-                if json_matches:
-                    for match in reversed(json_matches):  # Try the last match first
-                        try:
-                            feedback = json.loads(match)
-                            print("Successfully extracted JSON from response using method 2")
-                            break
-                        except:
-                            continue
-            
-            # Method 3: Try to manually construct JSON from common patterns
-            if 'feedback' not in locals() or not isinstance(feedback, dict):
-                print("Attempting manual JSON construction...")
-                try:
-                    # Look for match_score pattern
-                    score_match = re.search(r'"match_score":\s*(\d+)', content)
-                    score = int(score_match.group(1)) if score_match else 50
-                    
-                    # Look for strengths pattern
-                    strengths_match = re.search(r'"strengths":\s*\[(.*?)\]', content, re.DOTALL)
-                    strengths = []
-                    if strengths_match:
-                        strengths_text = strengths_match.group(1)
-                        strengths = [s.strip().strip('"') for s in strengths_text.split(',') if s.strip()]
-                    
-                    # Look for weaknesses pattern
-                    weaknesses_match = re.search(r'"weaknesses":\s*\[(.*?)\]', content, re.DOTALL)
-                    weaknesses = []
-                    if weaknesses_match:
-                        weaknesses_text = weaknesses_match.group(1)
-                        weaknesses = [s.strip().strip('"') for s in weaknesses_text.split(',') if s.strip()]
-                    
-                    # Look for suggestions pattern
-                    suggestions_match = re.search(r'"suggestions":\s*\[(.*?)\]', content, re.DOTALL)
-                    suggestions = []
-                    if suggestions_match:
-                        suggestions_text = suggestions_match.group(1)
-                        suggestions = [s.strip().strip('"') for s in suggestions_text.split(',') if s.strip()]
-                    
-                    feedback = {
-                        "match_score": score,
-                        "strengths": strengths if strengths else ["Unable to parse strengths"],
-                        "weaknesses": weaknesses if weaknesses else ["Unable to parse weaknesses"],
-                        "suggestions": suggestions if suggestions else ["Unable to parse suggestions"]
-                    }
-                    print("Successfully constructed JSON manually")
-                except Exception as manual_error:
-                    print(f"Manual construction failed: {manual_error}")
-            
-            # If all methods failed, create a fallback response
-            if 'feedback' not in locals() or not isinstance(feedback, dict):
-                print("Creating fallback response due to JSON parsing failure")
-                feedback = {
-                    "match_score": 50,
-                    "strengths": ["Unable to parse AI response"],
-                    "weaknesses": ["Response format error"],
-                    "suggestions": ["Please try again with different input"]
-                }
-        
-        print(f"Parsed feedback: {feedback}")
-        print(f"Match score: {feedback.get('match_score', 'NOT FOUND')}")
-        
-        return feedback
-    except Exception as e:
-        print(f"Error parsing OpenAI response: {e}")
-        print(f"Raw response: {response.choices[0].message.content if response.choices[0].message.content else 'None'}")
-        return {
-            "match_score": 0,
-            "strengths": [],
-            "weaknesses": [],
-            "suggestions": [f"Error parsing OpenAI response: {e}"]
-        }
+    logger.debug("OpenAI response length: %d", received)
+    return _finish_feedback(parser)
+
+
+def _snapshot(root):
+    """
+    Returns:
+        dict: Copy of the schema fields parsed so far whose values are valid;
+            list fields keep only their string elements.
+    """
+    snapshot = {}
+    for field in FEEDBACK_SCHEMA['required']:
+        value = root.get(field)
+        if isinstance(value, list):
+            value = [item for item in value if isinstance(item, str)]
+        if is_valid_field(field, value):
+            snapshot[field] = value
+    return snapshot
+
+
+def _parse_feedback(content):
+    """
+    Parses a complete model response into a feedback dict.
+    Args:
+        content (str): Raw model response.
+    Returns:
+        tuple: (feedback dict, False if the response was truncated or unusable).
+    """
+    parser = IncrementalJSONParser(FEEDBACK_SCHEMA['required'])
+    parser.feed(content)
+    return _finish_feedback(parser)
+
+
+def _finish_feedback(parser):
+    """
+    Turns the parser state into feedback. Fenced or chatty output is
+    accepted as is; missing fields are filled in and mark the result as
+    not cacheable.
+    Args:
+        parser (IncrementalJSONParser): Parser fed with the whole response.
+    Returns:
+        tuple: (feedback dict, whether the result is safe to cache).
+    """
+    with timed('json_repair'):
+        root = parser.close()
+        if not isinstance(root, dict) or not root:
+            logger.warning("Creating fallback response due to JSON parsing failure")
+            JSON_REPAIR.inc(method='fallback')
+            return {
+                "match_score": 50,
+                "strengths": ["Unable to parse AI response"],
+                "weaknesses": ["Response format error"],
+                "suggestions": ["Please try again with different input"]
+            }, False
+
+        if parser.skipped_prefix or parser.skipped_suffix:
+            JSON_REPAIR.inc(method='unwrapped')
+        cacheable = parser.complete
+        if not parser.complete:
+            logger.warning("OpenAI response was truncated; using the fields that completed")
+            JSON_REPAIR.inc(method='truncated')
+
+        feedback = {field: root.get(field) for field in FEEDBACK_SCHEMA['required']}
+        for field in validate_feedback(feedback):
+            feedback[field] = 50 if field == 'match_score' else [f"Unable to parse {field}"]
+            cacheable = False
+        logger.debug("Parsed feedback match score: %s", feedback['match_score'])
+        return feedback, cacheable
@@ -1,113 +1,478 @@
-from pdfminer.high_level import extract_text
-from pdfminer.layout import LAParams
-import PyPDF2
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
 import io
+import logging
+import multiprocessing
 import os
 import re
+import threading
+import time
 
-def extract_text_from_pdf(pdf_path):
+from utils.resume_document import BULLET_MARKERS, parse_resume
+
+logger = logging.getLogger(__name__)
+
+# Quality thresholds for accepting a backend's output without falling back
+MIN_TEXT_CHARS = 200
+MAX_GARBLED_RATIO = 0.2
+
+# Budgets so a single pathological PDF cannot pin a worker
+MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 30))
+TIME_BUDGET_SECONDS = float(os.getenv('PDF_TIME_BUDGET_SECONDS', 10))
+
+# Documents with at least this many pages are extracted in parallel
+PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 4))
+# Smaller documents of at least ISOLATE_MIN_PAGES pages run as a single pool
+# task, so the time budget can cut them off too. Shorter ones, and every
+# document when PDF_ISOLATE=0 (for callers that are pool workers
+# themselves), are extracted in the calling process, where a task costs no
+# pickling of the PDF and the budget is only checked between backends.
+ISOLATE = os.getenv('PDF_ISOLATE', '1') == '1'
+ISOLATE_MIN_PAGES = int(os.getenv('PDF_ISOLATE_MIN_PAGES', 2))
+PARALLEL_WORKERS = int(os.getenv('PDF_WORKERS', min(4, os.cpu_count() or 1)))
+PARALLEL_PAGES_PER_TASK = 2
+
+_pool = None
+_pool_lock = threading.Lock()
+
+_CID_PATTERN = re.compile(r'\(cid:\d+\)')
+_PAGE_MARKER_PATTERN = re.compile(r'--- PAGE \d+ ---')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+PDF_MAGIC = b'%PDF-'
+
+
+def is_pdf_bytes(data):
     """
-    Extracts text from a PDF file using multiple methods for maximum coverage.
+    Check the PDF magic bytes. Some writers put junk before the header, so
+    the marker may appear anywhere in the first kilobyte.
     Args:
-        pdf_path (str): Path to the PDF file.
+        data (bytes): Start of the file.
     Returns:
-        str: Extracted text.
+        bool: True if the data looks like a PDF.
+    """
+    return PDF_MAGIC in data[:1024]
+
+
+# The PDF libraries are imported on first use rather than at module import:
+# they dominate worker start-up time and memory, and most workers only ever
+# touch the first backend that succeeds.
+@lru_cache(maxsize=None)
+def _load_fitz():
+    """
+    Returns:
+        module: PyMuPDF, or None if it is not installed.
     """
-    print(f"=== PDF EXTRACTION DEBUG ===")
-    print(f"PDF file size: {os.path.getsize(pdf_path)} bytes")
-    
-    all_texts = []
-    
-    # Method 1: PDFMiner with different parameters
     try:
-        # Try with default parameters
-        text1 = extract_text(pdf_path)
-        all_texts.append(("PDFMiner Default", text1))
-        print(f"PDFMiner Default: {len(text1)} characters")
-        
-        # Try with optimized parameters
-        laparams = LAParams(
-            line_margin=0.5,
-            word_margin=0.1,
-            char_margin=2.0,
-            boxes_flow=0.5,
-            detect_vertical=True
-        )
-        text2 = extract_text(pdf_path, laparams=laparams)
-        all_texts.append(("PDFMiner Optimized", text2))
-        print(f"PDFMiner Optimized: {len(text2)} characters")
-        
-    except Exception as e:
-        print(f"PDFMiner failed: {e}")
-    
-    # Method 2: PyPDF2
+        import fitz
+    except ImportError:
+        return None
+    return fitz
+
+
+def _extract_with_pymupdf(pdf_data, page_numbers=None):
+    """
+    Fast extraction using PyMuPDF.
+    Args:
+        pdf_data (bytes): PDF file contents.
+        page_numbers (list): Zero-based pages to extract; all pages if None.
+            Numbers past the end of the document are ignored.
+    Returns:
+        list: Raw text of each requested page.
+    """
+    fitz = _load_fitz()
+    if fitz is None:
+        raise RuntimeError("PyMuPDF is not installed")
+    doc = fitz.open(stream=pdf_data, filetype='pdf')
+    try:
+        if page_numbers is None:
+            page_numbers = range(doc.page_count)
+        return [doc[i].get_text() for i in page_numbers if i < doc.page_count]
+    finally:
+        doc.close()
+
+
+def _extract_with_pdfminer(pdf_data, page_numbers=None):
+    """
+    Slow but thorough extraction using pdfminer layout analysis.
+    Args:
+        pdf_data (bytes): PDF file contents.
+        page_numbers (list): Zero-based pages to extract; all pages if None.
+            Numbers past the end of the document are ignored.
+    Returns:
+        list: Raw text of each requested page.
+    """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LAParams, LTTextContainer
+
+    laparams = LAParams(
+        line_margin=0.5,
+        word_margin=0.1,
+        char_margin=2.0,
+        boxes_flow=0.5,
+        detect_vertical=True
+    )
+    return [
+        ''.join(element.get_text() for element in page if isinstance(element, LTTextContainer))
+        for page in extract_pages(io.BytesIO(pdf_data), page_numbers=page_numbers, laparams=laparams)
+    ]
+
+
+def _extract_with_pypdf2(pdf_data, page_numbers=None):
+    """
+    Page-by-page extraction using PyPDF2, used as a last resort.
+    Args:
+        pdf_data (bytes): PDF file contents.
+        page_numbers (list): Zero-based pages to extract; all pages if None.
+            Numbers past the end of the document are ignored.
+    Returns:
+        list: Raw text of each requested page.
+    """
+    import PyPDF2
+
+    pages = PyPDF2.PdfReader(io.BytesIO(pdf_data)).pages
+    if page_numbers is None:
+        page_numbers = range(len(pages))
+    return [pages[i].extract_text() or "" for i in page_numbers if i < len(pages)]
+
+
+# Backends in the order they are tried. The first one whose output passes
+# the quality check wins; append or reorder entries to plug in others.
+# Each takes (pdf_data, page_numbers) and returns one string per page.
+EXTRACTION_BACKENDS = [
+    ('pymupdf', _extract_with_pymupdf),
+    ('pdfminer', _extract_with_pdfminer),
+    ('pypdf2', _extract_with_pypdf2),
+]
+
+
+def count_pages(pdf_data):
+    """
+    Args:
+        pdf_data (bytes): PDF file contents.
+    Returns:
+        int: Number of pages in the document.
+    """
+    fitz = _load_fitz()
+    if fitz is not None:
+        doc = fitz.open(stream=pdf_data, filetype='pdf')
+        try:
+            return doc.page_count
+        finally:
+            doc.close()
+    import PyPDF2
+
+    return len(PyPDF2.PdfReader(io.BytesIO(pdf_data)).pages)
+
+
+def garbled_ratio(text):
+    """
+    Estimate how much of the text is extraction garbage.
+    Args:
+        text (str): Raw extracted text.
+    Returns:
+        float: Fraction of characters that look like font-decoding artifacts.
+    """
+    if not text:
+        return 1.0
+    cid_chars = sum(len(m) for m in _CID_PATTERN.findall(text))
+    bad_chars = sum(
+        1 for ch in text
+        if ch == '\ufffd' or (not ch.isprintable() and not ch.isspace())
+    )
+    return min(1.0, (cid_chars + bad_chars) / len(text))
+
+
+def is_acceptable_text(text):
+    """
+    Check whether extracted text is good enough to skip slower backends.
+    Args:
+        text (str): Raw extracted text.
+    Returns:
+        bool: True if the text is long enough and not garbled.
+    """
+    return (
+        bool(text)
+        and len(text.strip()) >= MIN_TEXT_CHARS
+        and garbled_ratio(text) <= MAX_GARBLED_RATIO
+    )
+
+
+def clean_extracted_text(text):
+    """
+    Normalize raw extracted text while keeping its line structure: spaces
+    are collapsed within lines, runs of blank lines become one, and a bullet
+    glyph extracted on its own line is joined to the line it marks.
+    Args:
+        text (str): Raw extracted text.
+    Returns:
+        str: Cleaned text, one text line per line.
+    """
+    if not text:
+        return ""
+    text = _PAGE_MARKER_PATTERN.sub('', text)
+    text = _CID_PATTERN.sub('', text).replace('\x00', '')
+
+    cleaned_lines = []
+    pending_bullet = False
+    for line in text.splitlines():
+        line = _WHITESPACE_PATTERN.sub(' ', line).strip()
+        if not line:
+            if cleaned_lines and cleaned_lines[-1]:
+                cleaned_lines.append('')
+        elif line in BULLET_MARKERS:
+            pending_bullet = True
+        elif any(ch.isalnum() for ch in line):
+            cleaned_lines.append(f"• {line}" if pending_bullet else line)
+            pending_bullet = False
+    return '\n'.join(cleaned_lines).strip()
+
+
+def _join_pages(pages):
+    """
+    Clean each page and join them with a blank line.
+    Returns:
+        tuple: (text, offset where each page starts).
+    """
+    parts = []
+    page_starts = []
+    offset = 0
+    for page in pages:
+        page_starts.append(offset)
+        page = clean_extracted_text(page)
+        if page:
+            parts.append(page)
+            offset += len(page) + 2
+    return '\n\n'.join(parts), page_starts or [0]
+
+
+def _read_pdf(pdf):
+    if isinstance(pdf, (bytes, bytearray, memoryview)):
+        return bytes(pdf)
+    with open(pdf, 'rb') as f:
+        return f.read()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawn rather than fork: gunicorn workers may already run threads
+            _pool = ProcessPoolExecutor(
+                max_workers=PARALLEL_WORKERS,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _terminate_pool(pool):
+    terminate_workers = getattr(pool, 'terminate_workers', None)  # Python 3.14+
+    if terminate_workers is not None:
+        terminate_workers()
+        return
+    for process in list((pool._processes or {}).values()):
+        process.terminate()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _retire_pool(pool, grace):
+    """
+    Stop handing work to a pool whose workers are stuck on tasks past their
+    deadline, and kill its processes once every request still waiting on it
+    has run out of time too.
+    Args:
+        pool (ProcessPoolExecutor): Pool to retire.
+        grace (float): Seconds until its workers are terminated.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is not pool:
+            return
+        _pool = None
+    timer = threading.Timer(grace, _terminate_pool, args=(pool,))
+    timer.daemon = True
+    timer.start()
+
+
+def _forget_pool_after_fork():
+    # The parent's pool cannot be used or shut down from a forked child:
+    # its management thread did not survive the fork
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+
+def _run_backend_pooled(backend, pdf_data, page_numbers, deadline, pages_per_task=PARALLEL_PAGES_PER_TASK):
+    """
+    Run a backend over contiguous page chunks in the process pool, waiting
+    no longer than the deadline.
+    Args:
+        pages_per_task (int): Chunk size; len(page_numbers) runs one task.
+    Returns:
+        tuple: (page texts in page order with '' for unfinished chunks,
+            number of pages that finished, True if the deadline cut it short).
+    """
+    # Small chunks so that pages finished before the deadline can be kept
+    chunks = [
+        page_numbers[i:i + pages_per_task]
+        for i in range(0, len(page_numbers), pages_per_task)
+    ]
+
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(backend, pdf_data, chunk) for chunk in chunks]
+    except BrokenProcessPool:
+        _reset_pool()
+        raise
+    done, not_done = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+    # Queued chunks are dropped; a chunk that already started cannot be
+    # cancelled, so its worker is only freed by retiring the pool
+    running = [future for future in not_done if not future.cancel()]
+    if running:
+        _retire_pool(pool, TIME_BUDGET_SECONDS)
+
+    pages = []
+    finished = 0
+    for future, chunk in zip(futures, chunks):
+        if future in done:
+            try:
+                chunk_pages = future.result()
+            except BrokenProcessPool:
+                _reset_pool()
+                raise
+            pages.extend(chunk_pages)
+            finished += len(chunk_pages)
+        else:
+            pages.extend([""] * len(chunk))
+    return pages, finished, bool(not_done)
+
+
+def extract_pdf(pdf, backends=None, max_pages=None, time_budget=None):
+    """
+    Extracts text from a PDF, trying fast backends first and falling back to
+    slower ones only when the result is too short or garbled. Documents with
+    at least PARALLEL_MIN_PAGES pages are split across a process pool, and
+    smaller ones of at least ISOLATE_MIN_PAGES pages run as one pool task
+    (unless ISOLATE is off); the rest are extracted in-process. Extraction
+    stops at max_pages pages, even when the page count is unknown, or after
+    time_budget seconds.
+    Args:
+        pdf (bytes or str): PDF contents, or a path to read them from.
+        backends (list): Optional list of (name, function) pairs to try in order.
+        max_pages (int): Maximum number of pages to read. Defaults to MAX_PAGES.
+        time_budget (float): Wall-clock seconds for the whole document.
+            Defaults to TIME_BUDGET_SECONDS.
+    Returns:
+        dict: Cleaned text and its structured ResumeDocument, the backend
+            that produced it, per-backend timings, page counts, and
+            'partial' whenever the time budget ran out; 'pages_read' counts
+            the pages the chosen backend returned.
+    """
+    if backends is None:
+        backends = EXTRACTION_BACKENDS
+    if max_pages is None:
+        max_pages = MAX_PAGES
+    if time_budget is None:
+        time_budget = TIME_BUDGET_SECONDS
+    deadline = time.monotonic() + time_budget
+    pdf_data = _read_pdf(pdf)
+
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text_pdf2 = ""
-            for i, page in enumerate(pdf_reader.pages):
-                page_text = page.extract_text()
-                text_pdf2 += f"\n--- PAGE {i+1} ---\n" + page_text + "\n"
-            all_texts.append(("PyPDF2", text_pdf2))
-            print(f"PyPDF2: {len(text_pdf2)} characters")
+        total_pages = count_pages(pdf_data)
     except Exception as e:
-        print(f"PyPDF2 failed: {e}")
-    
-    # Method 3: PyMuPDF (if available) - DISABLED due to linter issues
-    # try:
-    #     doc = fitz.open(pdf_path)
-    #     text_mupdf = ""
-    #     for i in range(len(doc)):
-    #         page = doc[i]
-    #         text_mupdf += f"\n--- PAGE {i+1} ---\n" + page.get_text() + "\n"
-    #     doc.close()
-    #     all_texts.append(("PyMuPDF", text_mupdf))
-    #     print(f"PyMuPDF: {len(text_mupdf)} characters")
-    # except Exception as e:
-    #     print(f"PyMuPDF failed: {e}")
-    
-    # Find the method that extracted the most text
+        logger.warning("Could not count PDF pages: %s", e)
+        total_pages = None
+    # Backends skip page numbers past the end, so an unknown count still caps them
+    page_numbers = list(range(min(total_pages, max_pages) if total_pages is not None else max_pages))
+    parallel = total_pages is not None and len(page_numbers) >= PARALLEL_MIN_PAGES
+    # An unknown page count may hide a long document, so it is isolated too
+    isolate = ISOLATE and page_numbers and (total_pages is None or len(page_numbers) >= ISOLATE_MIN_PAGES)
+
+    timings = {}
     best_text = ""
-    best_method = "None"
-    best_length = 0
-    
-    for method, text in all_texts:
-        if text and len(text) > best_length:
-            best_text = text
-            best_method = method
-            best_length = len(text)
-    
-    print(f"Best extraction method: {best_method} ({best_length} characters)")
-    
-    # Clean up the best text
-    if best_text:
-        # Remove page markers and excessive formatting
-        cleaned_text = best_text
-        
-        # Remove page markers like "--- PAGE 1 ---"
-        cleaned_text = re.sub(r'--- PAGE \d+ ---', '', cleaned_text)
-        
-        # Remove excessive whitespace but preserve meaningful line breaks
-        lines = cleaned_text.split('\n')
-        cleaned_lines = []
-        for line in lines:
-            line = line.strip()
-            if line and len(line) > 2:  # Only keep non-empty lines with meaningful content
-                cleaned_lines.append(line)
-        
-        # Join with single spaces, but preserve some structure
-        final_text = ' '.join(cleaned_lines)
-        
-        # Remove common PDF artifacts
-        final_text = final_text.replace('\x00', '')  # Remove null characters
-        final_text = final_text.replace('\r', ' ')   # Replace carriage returns
-        final_text = re.sub(r'\s+', ' ', final_text)  # Normalize whitespace
-        
-        print(f"Final cleaned text length: {len(final_text)}")
-        print(f"Text preview (first 500 chars): {final_text[:500]}...")
-        print(f"Text preview (last 200 chars): ...{final_text[-200:]}")
-        
-        return final_text
-    else:
-        print("No text could be extracted from PDF using any method")
-        return "" 
\ No newline at end of file
+    best_pages = []
+    best_read = 0
+    best_backend = None
+    partial = False
+
+    for name, backend in backends:
+        if time.monotonic() >= deadline:
+            partial = True
+            break
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            if parallel:
+                pages, read, timed_out = _run_backend_pooled(backend, pdf_data, page_numbers, deadline)
+            elif isolate:
+                pages, read, timed_out = _run_backend_pooled(backend, pdf_data, page_numbers, deadline,
+                                                             pages_per_task=len(page_numbers))
+            else:
+                pages = backend(pdf_data, page_numbers)
+                read = len(pages)
+            text = "\n".join(pages)
+        except Exception as e:
+            logger.warning("%s extraction failed: %s", name, e)
+            text = ""
+        timings[name] = time.perf_counter() - start
+        partial = partial or timed_out
+
+        if is_acceptable_text(text) and not timed_out:
+            best_text, best_pages, best_read, best_backend = text, pages, read, name
+            break
+
+        # Keep the best partial result in case nothing passes the quality check
+        if text and len(text) * (1 - garbled_ratio(text)) > len(best_text) * (1 - garbled_ratio(best_text)):
+            best_text, best_pages, best_read, best_backend = text, pages, read, name
+        if timed_out:
+            break
+
+    text, page_starts = _join_pages(best_pages)
+    return {
+        'text': text,
+        'document': parse_resume(text, page_starts),
+        'backend': best_backend,
+        'timings': timings,
+        'total_pages': total_pages,
+        'pages_read': best_read,
+        'truncated': total_pages is not None and total_pages > max_pages,
+        'partial': partial,
+    }
+
+
+def extract_text_from_pdf(pdf):
+    """
+    Extracts text from a PDF file.
+    Args:
+        pdf (bytes or str): PDF contents, or a path to the PDF file.
+    Returns:
+        str: Extracted text.
+    """
+    pdf_data = _read_pdf(pdf)
+    result = extract_pdf(pdf_data)
+
+    logger.debug("PDF of %d bytes: %s won (%d characters), timings %s", len(pdf_data),
+                 result['backend'], len(result['text']),
+                 {name: round(seconds * 1000, 1) for name, seconds in result['timings'].items()})
+    if result['truncated']:
+        logger.info("Only the first %s of %s pages were read", result['pages_read'], result['total_pages'])
+    if result['partial']:
+        logger.warning("Extraction time budget ran out; text is partial")
+
+    if not result['text']:
+        logger.warning("No text could be extracted from PDF using any method")
+    return result['text']
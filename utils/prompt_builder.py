@@ -0,0 +1,203 @@
+import logging
+import math
+import re
+
+from utils.keyword_matcher import extract_keywords
+from utils.resume_document import parse_resume
+
+logger = logging.getLogger(__name__)
+
+# Approximate pieces per token for the fallback counter: words are split
+# into ~4 character chunks, punctuation counts on its own
+_PIECE_PATTERN = re.compile(r'[A-Za-z]+|\d+|[^\sA-Za-z\d]')
+
+
+class TokenCounter:
+    """
+    Counts tokens with tiktoken (a requirement), falling back to a
+    character-based approximation that errs on the high side when it is
+    missing or its encoding cannot be loaded, e.g. when the BPE file
+    download fails.
+    Args:
+        model (str): Model name used to pick the tiktoken encoding.
+    """
+
+    def __init__(self, model='gpt-4'):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+
+    @property
+    def encoding(self):
+        if not self._loaded:
+            try:
+                import tiktoken
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except Exception as e:
+                logger.warning("Using approximate token counts, tiktoken is unavailable: %s", e)
+                self._encoding = None
+            self._loaded = True
+        return self._encoding
+
+    def count(self, text):
+        if self.encoding is not None:
+            return len(self.encoding.encode(text))
+        return sum((len(piece) + 3) // 4 for piece in _PIECE_PATTERN.findall(text))
+
+    def truncate(self, text, budget):
+        """
+        Cut text to at most budget tokens, ending on a whole word.
+        """
+        if budget <= 0:
+            return ''
+        if self.encoding is not None:
+            tokens = self.encoding.encode(text)
+            if len(tokens) <= budget:
+                return text
+            text = self.encoding.decode(tokens[:budget])
+            return text[:text.rfind(' ')] if ' ' in text else text
+        used = 0
+        end = 0
+        for match in re.finditer(r'\S+', text):
+            used += self.count(match.group())
+            if used > budget:
+                break
+            end = match.end()
+        return text[:end]
+
+
+def relevance_weights(job_description, keyword_result=None):
+    """
+    Weight job keywords for ranking resume blocks: every job keyword counts
+    once, keywords compare_keywords found in both texts count double.
+    Args:
+        job_description (str): Job description text.
+        keyword_result (dict): Optional output of compare_keywords.
+    Returns:
+        dict: Keyword to weight.
+    """
+    weights = dict.fromkeys(extract_keywords(job_description), 1)
+    if keyword_result:
+        for word in keyword_result.get('matched_keywords', ()):
+            weights[word] = 2
+    return weights
+
+
+class PromptBuilder:
+    """
+    Fits the resume and job description into token budgets. When the
+    resume is over budget, its blocks (an entry with its bullets) are ranked by the weight of job
+    keywords they contain per token and the densest ones are kept, in
+    their original order, under their section headings. The header block
+    (name and contact details) is always kept, and every section keeps
+    at least its best block within min_section_tokens, so sections with
+    few job keywords, such as education, are shortened rather than dropped.
+    Args:
+        resume_tokens (int): Token budget for the resume.
+        job_tokens (int): Token budget for the job description.
+        model (str): Model name for the token counter.
+        min_section_tokens (int): Budget set aside for each section.
+    """
+
+    def __init__(self, resume_tokens=900, job_tokens=600, model='gpt-4', min_section_tokens=40):
+        self.resume_tokens = resume_tokens
+        self.job_tokens = job_tokens
+        self.min_section_tokens = min_section_tokens
+        self.counter = TokenCounter(model)
+
+    def pack_resume(self, resume_text, job_description, keyword_result=None, document=None):
+        """
+        Args:
+            resume_text (str): Resume text.
+            job_description (str): Job description text.
+            keyword_result (dict): Optional output of compare_keywords.
+            document (ResumeDocument): Optional parsed resume; its sections and
+                memoized block keywords are reused. Parsed from resume_text if None.
+        Returns:
+            str: Resume text within the resume token budget.
+        """
+        count = self.counter.count
+        if count(resume_text) <= self.resume_tokens:
+            return resume_text
+
+        weights = relevance_weights(job_description, keyword_result)
+        skills = [skill.lower() for skill in (keyword_result or {}).get('matched_skills', ())]
+        if document is None:
+            document = parse_resume(resume_text)
+        blocks = []
+        sections = document.sections
+        for section_index, (section, keywords) in enumerate(zip(sections, document.block_keywords())):
+            heading = section.heading
+            heading_cost = count(heading) if heading else 0
+            for block_index, block in enumerate(document.block_texts(section)):
+                lowered = block.lower()
+                score = sum(map(weights.get, set(keywords[block_index]) & weights.keys()))
+                score += 3 * sum(1 for skill in skills if skill in lowered)
+                blocks.append((section_index, block_index, heading, heading_cost, block, count(block), score))
+
+        chosen = {}
+        remaining = self.resume_tokens
+
+        def take(entry, limit):
+            # Add a block, with its heading if the section is new, cut down
+            # to fit in limit tokens
+            nonlocal remaining
+            section_index, block_index, heading, heading_cost, block, cost, score = entry
+            needed = cost + (heading_cost if section_index not in chosen else 0)
+            if needed > limit:
+                block = self.counter.truncate(block, limit - needed + cost)
+                if not block:
+                    return False
+                needed = limit
+            chosen.setdefault(section_index, {})[block_index] = block
+            remaining -= needed
+            return True
+
+        ranked = sorted(blocks, key=lambda b: (-b[6] / math.sqrt(b[5] + 1), b[0], b[1]))
+        if sections[0].kind == 'header':
+            header = next((entry for entry in blocks if entry[0] == 0), None)
+            if header is not None:
+                # A quarter of the budget at most, unless nothing else competes
+                others = any(entry[0] for entry in blocks)
+                take(header, max(1, self.resume_tokens // 4) if others else remaining)
+        # Each section without a block yet has min_section_tokens set aside
+        # for its best one, and the set-aside is released once it has one
+        uncovered = {entry[0] for entry in blocks} - chosen.keys()
+        floor = min(self.min_section_tokens, remaining // max(1, len(uncovered)))
+
+        # Irrelevant blocks that do not fit whole are cut down only after
+        # every whole block had its chance, so they fill what budget is left
+        oversized = []
+        for candidates in (ranked, oversized):
+            for entry in candidates:
+                section_index, block_index = entry[0], entry[1]
+                if block_index in chosen.get(section_index, ()):
+                    continue
+                available = remaining - floor * len(uncovered - {section_index})
+                if available <= 0:
+                    continue
+                needed = entry[5] + (entry[3] if section_index not in chosen else 0)
+                if needed > available and entry[6] <= 0 and candidates is ranked:
+                    oversized.append(entry)
+                    continue
+                if take(entry, available):
+                    uncovered.discard(section_index)
+        for entry in ranked:
+            if entry[0] in uncovered and take(entry, min(floor, remaining)):
+                uncovered.discard(entry[0])
+        if not chosen:
+            return self.counter.truncate(resume_text, self.resume_tokens)
+
+        parts = []
+        for section_index in sorted(chosen):
+            heading = sections[section_index].heading
+            body = [chosen[section_index][i] for i in sorted(chosen[section_index])]
+            parts.append('\n'.join(([heading] if heading else []) + body))
+        return '\n\n'.join(parts)
+
+    def fit_job(self, job_description):
+        """
+        Returns:
+            str: Job description cut to the job token budget.
+        """
+        return self.counter.truncate(job_description, self.job_tokens)
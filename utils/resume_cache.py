@@ -0,0 +1,190 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from utils.keyword_matcher import DEFAULT_TOKENIZER
+from utils.metrics import CACHE_REQUESTS
+from utils.resume_document import ResumeDocument, parse_resume
+
+
+# Bump when a change to extraction or resume parsing changes the cached
+# documents; tokenizer changes are covered by its fingerprint
+CACHE_FORMAT_VERSION = 2
+
+
+def content_key(data, tokenizer=DEFAULT_TOKENIZER):
+    """
+    Build a content-addressed cache key for uploaded bytes. The key also
+    covers the cache format and the tokenizer configuration, so documents
+    analyzed by older code are never served from the SQLite tier.
+    Args:
+        data (bytes): Raw uploaded file contents.
+        tokenizer (KeywordTokenizer): Tokenizer the cached keyword counts come from.
+    Returns:
+        str: Hex SHA-256 digest of the version, tokenizer and contents.
+    """
+    digest = hashlib.sha256(f'v{CACHE_FORMAT_VERSION}:{tokenizer.fingerprint}:'.encode('ascii'))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class ResumeCache:
+    """
+    Two-tier cache of parsed resume documents (text, section structure and
+    keyword frequencies).
+
+    The memory tier is a per-process LRU bounded by total text size. The
+    optional disk tier is a SQLite file that all gunicorn workers on the
+    host can share; it is bounded the same way and evicts least recently
+    used rows.
+    """
+
+    def __init__(self, db_path=None, max_memory_bytes=32 * 1024 * 1024,
+                 max_disk_bytes=512 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if db_path:
+            with self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS resume_cache ("
+                    " key TEXT PRIMARY KEY,"
+                    " text TEXT NOT NULL,"
+                    " keywords TEXT NOT NULL,"
+                    " size INTEGER NOT NULL,"
+                    " last_access REAL NOT NULL,"
+                    " structure TEXT)"
+                )
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(resume_cache)")}
+                if 'structure' not in columns:
+                    # Rows written before documents were cached are re-parsed on read
+                    conn.execute("ALTER TABLE resume_cache ADD COLUMN structure TEXT")
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS resume_cache_last_access"
+                    " ON resume_cache (last_access)"
+                )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    @staticmethod
+    def _entry_size(document):
+        offsets = sum(len(s.blocks) + len(s.bullets) + 4 for s in document.sections)
+        keywords = document.keyword_frequency()
+        return len(document.text) + sum(len(word) + 8 for word in keywords) + 4 * offsets
+
+    def get(self, key):
+        """
+        Look up a cached entry.
+        Args:
+            key (str): Content key from content_key().
+        Returns:
+            ResumeDocument: The cached document, or None on a miss.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache='resume', result='hit')
+                return entry[0]
+
+        if self.db_path:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT text, keywords, structure FROM resume_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE resume_cache SET last_access = ? WHERE key = ?",
+                        (time.time(), key)
+                    )
+            if row is not None:
+                keywords = Counter(json.loads(row[1]))
+                if row[2] is not None:
+                    document = ResumeDocument.from_dict(dict(json.loads(row[2]), text=row[0]), keywords)
+                else:
+                    document = parse_resume(row[0])
+                self._put_memory(key, document)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                CACHE_REQUESTS.inc(cache='resume', result='disk_hit')
+                return document
+
+        with self._lock:
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache='resume', result='miss')
+        return None
+
+    def put(self, key, document):
+        """
+        Store a parsed resume together with its keyword frequencies.
+        Args:
+            key (str): Content key from content_key().
+            document (ResumeDocument): Parsed resume.
+        """
+        self._put_memory(key, document)
+        if self.db_path:
+            size = self._entry_size(document)
+            structure = document.to_dict()
+            text = structure.pop('text')
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO resume_cache (key, text, keywords, size, last_access, structure)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, text, json.dumps(document.keyword_frequency()), size, time.time(),
+                     json.dumps(structure))
+                )
+                self._evict_disk(conn)
+
+    def _put_memory(self, key, document):
+        size = self._entry_size(document)
+        if size > self.max_memory_bytes:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= old[1]
+            self._memory[key] = (document, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted[1]
+
+    def _evict_disk(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM resume_cache").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in conn.execute(
+            "SELECT key, size FROM resume_cache ORDER BY last_access"
+        ).fetchall():
+            conn.execute("DELETE FROM resume_cache WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    def stats(self):
+        """
+        Returns:
+            dict: Hit/miss counters and current memory tier usage.
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+            }
@@ -0,0 +1,267 @@
+from array import array
+from collections import Counter
+
+from utils.keyword_matcher import DEFAULT_TOKENIZER, extract_keywords
+
+BULLET_MARKERS = ('-', '*', '•', '▪', '◦', '·', '‣', '●', '○', '■', '–')
+
+# First heading word -> section kind. Headings that match none are 'other'.
+SECTION_KINDS = {
+    'summary': 'summary', 'profile': 'summary', 'objective': 'summary', 'about': 'summary',
+    'experience': 'experience', 'employment': 'experience', 'work': 'experience',
+    'professional': 'experience', 'career': 'experience', 'history': 'experience',
+    'education': 'education', 'academic': 'education', 'courses': 'education', 'coursework': 'education',
+    'skills': 'skills', 'technical': 'skills', 'technologies': 'skills',
+    'competencies': 'skills', 'qualifications': 'skills', 'tools': 'skills',
+    'projects': 'projects', 'certifications': 'certifications', 'certificates': 'certifications',
+    'awards': 'awards', 'publications': 'publications', 'languages': 'languages',
+    'interests': 'interests', 'volunteer': 'volunteer', 'leadership': 'leadership',
+    'activities': 'activities',
+}
+
+# Longest line, in words, taken as a heading
+MAX_HEADING_WORDS = 4
+
+# Lowercase words allowed inside a title-case heading, e.g. "Honors and Awards"
+HEADING_CONNECTORS = frozenset({'&', 'and', 'of', 'the', 'for'})
+
+
+def is_heading(line):
+    """
+    Guess whether a line is a section heading. It needs a heading's shape:
+    at most MAX_HEADING_WORDS words of letters, in title case or all caps,
+    with nothing after a colon. It must also end in a known section word.
+    "Work History" and "SKILLS:" are headings; job titles like "Technical
+    Lead", skill lists like "AWS, GCP, SQL" and lead-ins like "Led a team
+    of 5 to ship:" are not.
+    Args:
+        line (str): One line of resume text.
+    Returns:
+        bool: True if the line looks like a heading.
+    """
+    stripped = line.strip()
+    if stripped.endswith(':'):
+        stripped = stripped[:-1].rstrip()
+    words = stripped.split()
+    if not words or len(words) > MAX_HEADING_WORDS or stripped.startswith(BULLET_MARKERS):
+        return False
+    for word in words:
+        if word in HEADING_CONNECTORS:
+            continue
+        if not word.replace('-', '').isalpha() or not (word.isupper() or word[0].isupper()):
+            return False
+    return words[-1].lower() in SECTION_KINDS
+
+
+def section_kind(heading):
+    """
+    Args:
+        heading (str): Heading line, or '' for text before the first heading.
+    Returns:
+        str: Section kind such as 'experience', 'skills', 'header' or 'other'.
+    """
+    if not heading:
+        return 'header'
+    for word in heading.lower().replace('&', ' ').split():
+        kind = SECTION_KINDS.get(word.strip(':,'))
+        if kind:
+            return kind
+    return 'other'
+
+
+class ResumeSection:
+    """
+    One headed section of a resume. Offsets index into the document text;
+    blocks (an entry such as a job with its bullets) and bullets are
+    flattened (start, end) pairs in unsigned int arrays.
+    """
+
+    __slots__ = ('kind', 'heading', 'start', 'end', 'blocks', 'bullets')
+
+    def __init__(self, kind, heading, start, end=None, blocks=None, bullets=None):
+        self.kind = kind
+        self.heading = heading
+        self.start = start
+        self.end = start if end is None else end
+        self.blocks = array('I') if blocks is None else array('I', blocks)
+        self.bullets = array('I') if bullets is None else array('I', bullets)
+
+    def __repr__(self):
+        return f"ResumeSection({self.kind!r}, {self.heading!r}, {self.start}, {self.end})"
+
+
+class ResumeDocument:
+    """
+    Compact structured view of a resume, built once per document.
+
+    Holds the text, its sections with block and bullet offsets, and page
+    start offsets. Keyword frequencies and word tokens are computed on first
+    use and memoized, so matching, prompt packing and caching share a single
+    scan of the text.
+    """
+
+    __slots__ = ('text', 'sections', 'page_starts', '_block_keywords', '_keywords', '_words')
+
+    def __init__(self, text, sections, page_starts=(0,), keywords=None):
+        self.text = text
+        self.sections = sections
+        self.page_starts = array('I', page_starts)
+        self._block_keywords = None
+        self._keywords = Counter(keywords) if keywords is not None else None
+        self._words = None
+
+    @classmethod
+    def parse(cls, text, page_starts=(0,)):
+        """
+        Split text into sections, blocks and bullets in one pass over its lines.
+        Args:
+            text (str): Resume text with line breaks preserved.
+            page_starts (tuple): Offset where each page begins.
+        Returns:
+            ResumeDocument: The parsed document.
+        """
+        current = ResumeSection('header', '', 0)
+        sections = [current]
+        block_start = None
+        block_end = 0
+        after_bullet = False
+        offset = 0
+
+        def close_block():
+            if block_start is not None:
+                current.blocks.extend((block_start, block_end))
+
+        for line in text.splitlines(keepends=True):
+            start, offset = offset, offset + len(line)
+            content = line.strip()
+            if not content:
+                close_block()
+                block_start, after_bullet = None, False
+                continue
+            line_start = start + len(line) - len(line.lstrip())
+            line_end = start + len(line.rstrip())
+
+            if is_heading(content):
+                close_block()
+                block_start, after_bullet = None, False
+                current = ResumeSection(section_kind(content), content, offset)
+                sections.append(current)
+                continue
+
+            bullet = content.startswith(BULLET_MARKERS)
+            if block_start is None or (after_bullet and not bullet):
+                close_block()
+                block_start = line_start
+            if bullet:
+                marker_end = line_start + 1
+                while marker_end < line_end and text[marker_end] in ' \t' + ''.join(BULLET_MARKERS):
+                    marker_end += 1
+                current.bullets.extend((marker_end, line_end))
+            block_end = current.end = line_end
+            after_bullet = bullet
+        close_block()
+
+        return cls(text, [s for s in sections if s.heading or len(s.blocks)], page_starts)
+
+    @classmethod
+    def from_dict(cls, data, keywords=None):
+        """
+        Rebuild a document from to_dict() output without re-parsing.
+        Args:
+            data (dict): Serialized document.
+            keywords (Counter): Optional keyword frequencies to reuse.
+        """
+        sections = [ResumeSection(*fields) for fields in data['sections']]
+        return cls(data['text'], sections, data.get('page_starts', (0,)), keywords)
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON-serializable form of the document.
+        """
+        return {
+            'text': self.text,
+            'page_starts': list(self.page_starts),
+            'sections': [
+                [s.kind, s.heading, s.start, s.end, list(s.blocks), list(s.bullets)]
+                for s in self.sections
+            ],
+        }
+
+    def section(self, kind):
+        """
+        Returns:
+            ResumeSection: First section of the given kind, or None.
+        """
+        for section in self.sections:
+            if section.kind == kind:
+                return section
+        return None
+
+    def block_texts(self, section):
+        blocks = section.blocks
+        return [self.text[blocks[i]:blocks[i + 1]] for i in range(0, len(blocks), 2)]
+
+    def bullet_texts(self, section):
+        bullets = section.bullets
+        return [self.text[bullets[i]:bullets[i + 1]] for i in range(0, len(bullets), 2)]
+
+    def page_of(self, offset):
+        """
+        Returns:
+            int: Zero-based page containing the character offset.
+        """
+        page = 0
+        for index, start in enumerate(self.page_starts):
+            if start > offset:
+                break
+            page = index
+        return page
+
+    def block_keywords(self):
+        """
+        Keywords of every block, tokenized once and memoized.
+        Returns:
+            list: One keyword list per section, each a list per block.
+        """
+        if self._block_keywords is None:
+            self._block_keywords = [
+                [extract_keywords(block) for block in self.block_texts(section)]
+                for section in self.sections
+            ]
+        return self._block_keywords
+
+    def keyword_frequency(self):
+        """
+        Returns:
+            Counter: Keyword frequencies over headings and blocks.
+        """
+        if self._keywords is None:
+            keywords = Counter()
+            for section, blocks in zip(self.sections, self.block_keywords()):
+                keywords.update(extract_keywords(section.heading))
+                for block in blocks:
+                    keywords.update(block)
+            self._keywords = keywords
+        return self._keywords
+
+    def words(self):
+        """
+        Returns:
+            list: Unfiltered word tokens of the whole text, for phrase matching.
+        """
+        if self._words is None:
+            self._words = DEFAULT_TOKENIZER.words(self.text)
+        return self._words
+
+
+def parse_resume(text, page_starts=(0,)):
+    """
+    Build the structured document for resume text.
+    Args:
+        text (str): Resume text with line breaks preserved.
+        page_starts (tuple): Offset where each page begins.
+    Returns:
+        ResumeDocument: Sections, blocks and bullets with character offsets.
+    """
+    return ResumeDocument.parse(text, page_starts)
@@ -0,0 +1,449 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import deque
+
+from utils.keyword_matcher import DEFAULT_TOKENIZER
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), 'data', 'skills.json')
+
+# Bump when the file layout changes so stale automata are rebuilt
+AUTOMATON_FORMAT_VERSION = 4
+AUTOMATON_MAGIC = b'RZSKILLS'
+
+# magic, version, byte order, source fingerprint, then the section sizes:
+# skills, words, states, word hash slots, edge hash slots, output ids, skill
+# name bytes, word bytes
+_HEADER = struct.Struct('<8sIII8I')
+_EMPTY = 0xFFFFFFFF
+
+
+def _hash_slots(count):
+    """
+    Returns:
+        int: Power-of-two hash table size keeping the load factor under 1/2.
+    """
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+def _edge_hash(state, word_id, mask):
+    return (state * 2654435761 + word_id * 40503) & mask
+
+
+def source_fingerprint(taxonomy_bytes, tokenizer=DEFAULT_TOKENIZER):
+    """
+    Args:
+        taxonomy_bytes (bytes): Raw taxonomy JSON.
+        tokenizer (KeywordTokenizer): Tokenizer the skill names are split with.
+    Returns:
+        int: CRC32 of the taxonomy and the tokenizer's fingerprint (its
+            version and word lists), the inputs that decide an automaton's
+            contents.
+    """
+    return zlib.crc32(tokenizer.fingerprint.encode('ascii'), zlib.crc32(taxonomy_bytes))
+
+
+def _count_match(counts, last_end, skill_id, position, length):
+    """
+    Count a match of skill_id ending at word position unless it overlaps the
+    skill's previous counted match.
+    """
+    if position - length >= last_end.get(skill_id, -1):
+        counts[skill_id] = counts.get(skill_id, 0) + 1
+        last_end[skill_id] = position
+
+
+def compare_skills(resume_skills, job_skills):
+    """
+    Args:
+        resume_skills (dict): find_skills() output for the resume.
+        job_skills (dict): find_skills() output for the job description.
+    Returns:
+        dict: Matched and missing canonical skills and a skill score.
+    """
+    matched = sorted(job_skills.keys() & resume_skills.keys(), key=lambda s: -job_skills[s])
+    missing = sorted(job_skills.keys() - resume_skills.keys(), key=lambda s: -job_skills[s])
+    return {
+        'matched_skills': matched,
+        'missing_skills': missing,
+        'skill_score': round(len(matched) / len(job_skills) * 100, 1) if job_skills else 0,
+    }
+
+
+class SkillMatcher:
+    """
+    Multi-word skill matcher compiled into a word-level Aho-Corasick
+    automaton. Every skill name and synonym becomes a path of word tokens;
+    one left-to-right pass over a document's tokens finds all of them.
+    """
+
+    def __init__(self, skills, goto, fail, outputs, fingerprint=0):
+        self.skills = skills      # skill id -> canonical name
+        self._goto = goto         # state -> {word: next state}
+        self._fail = fail         # state -> fallback state
+        self._outputs = outputs   # state -> tuple of (skill id, length in words) ending here
+        self.fingerprint = fingerprint  # source_fingerprint() of the inputs, 0 if unknown
+
+    @classmethod
+    def from_taxonomy(cls, taxonomy, tokenizer=DEFAULT_TOKENIZER):
+        """
+        Compile a skill taxonomy.
+        Args:
+            taxonomy (dict): Canonical skill name to list of synonyms.
+            tokenizer (KeywordTokenizer): Used to split names into words the
+                same way documents are split.
+        Returns:
+            SkillMatcher: Compiled matcher.
+        """
+        skills = []
+        goto = [{}]
+        outputs = [set()]
+        for canonical, synonyms in taxonomy.items():
+            skill_id = len(skills)
+            skills.append(canonical)
+            for surface in [canonical, *synonyms]:
+                state = 0
+                surface_words = tokenizer.words(surface)
+                for word in surface_words:
+                    next_state = goto[state].get(word)
+                    if next_state is None:
+                        next_state = len(goto)
+                        goto[state][word] = next_state
+                        goto.append({})
+                        outputs.append(set())
+                    state = next_state
+                if state:
+                    outputs[state].add((skill_id, len(surface_words)))
+
+        # Breadth-first pass to compute failure links and merge outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and word not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(word, 0)
+                outputs[next_state] |= outputs[fail[next_state]]
+
+        return cls(skills, goto, fail, [tuple(sorted(matches)) for matches in outputs])
+
+    @classmethod
+    def from_taxonomy_file(cls, path=DEFAULT_TAXONOMY_PATH, tokenizer=DEFAULT_TOKENIZER):
+        with open(path, 'rb') as f:
+            data = f.read()
+        matcher = cls.from_taxonomy(json.loads(data), tokenizer)
+        matcher.fingerprint = source_fingerprint(data, tokenizer)
+        return matcher
+
+    def save(self, path):
+        """
+        Write the automaton in the flat binary layout read by
+        MappedSkillMatcher, so workers can memory-map it at startup.
+
+        Every table is an array of unsigned 32-bit ints: word and skill
+        strings as one UTF-8 blob plus offsets, open-addressing hash tables
+        for word -> id and (state, word id) -> next state, failure links and
+        per-state output ranges of skill ids and match lengths. Nothing needs unpickling, and the pages are
+        shared through the OS page cache by every process that maps the file.
+        Args:
+            path (str): Destination file.
+        """
+        words = sorted({word for edges in self._goto for word in edges})
+        word_ids = {word: i for i, word in enumerate(words)}
+        word_bytes = [word.encode('utf-8') for word in words]
+        skill_bytes = [skill.encode('utf-8') for skill in self.skills]
+
+        word_slots = _hash_slots(len(words))
+        word_table = array('I', [0]) * word_slots
+        for word_id, encoded in enumerate(word_bytes):
+            slot = zlib.crc32(encoded) & (word_slots - 1)
+            while word_table[slot]:
+                slot = (slot + 1) & (word_slots - 1)
+            word_table[slot] = word_id + 1
+
+        edge_count = sum(len(edges) for edges in self._goto)
+        edge_slots = _hash_slots(edge_count)
+        edge_state = array('I', [_EMPTY]) * edge_slots
+        edge_word = array('I', [0]) * edge_slots
+        edge_next = array('I', [0]) * edge_slots
+        for state, edges in enumerate(self._goto):
+            for word, next_state in edges.items():
+                slot = _edge_hash(state, word_ids[word], edge_slots - 1)
+                while edge_state[slot] != _EMPTY:
+                    slot = (slot + 1) & (edge_slots - 1)
+                edge_state[slot], edge_word[slot], edge_next[slot] = state, word_ids[word], next_state
+
+        output_offsets = array('I', [0])
+        output_ids = array('I')
+        output_lengths = array('I')
+        for matches in self._outputs:
+            for skill_id, length in matches:
+                output_ids.append(skill_id)
+                output_lengths.append(length)
+            output_offsets.append(len(output_ids))
+
+        def offsets(blobs):
+            result = array('I', [0])
+            for blob in blobs:
+                result.append(result[-1] + len(blob))
+            return result
+
+        skill_blob = b''.join(skill_bytes)
+        word_blob = b''.join(word_bytes)
+        sections = [
+            offsets(word_bytes), word_table, edge_state, edge_word, edge_next,
+            array('I', self._fail), output_offsets, output_ids, output_lengths, offsets(skill_bytes),
+        ]
+        header = _HEADER.pack(
+            AUTOMATON_MAGIC, AUTOMATON_FORMAT_VERSION, sys.byteorder == 'little', self.fingerprint,
+            len(self.skills), len(words), len(self._goto), word_slots, edge_slots,
+            len(output_ids), len(skill_blob), len(word_blob),
+        )
+
+        # Write then rename so concurrently starting workers never read a
+        # half-written file
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(header)
+                for section in sections:
+                    section.tofile(f)
+                f.write(skill_blob)
+                f.write(word_blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        Memory-map an automaton written by save().
+        Args:
+            path (str): Compiled automaton file.
+        Returns:
+            MappedSkillMatcher: Matcher reading straight from the mapping.
+        """
+        return MappedSkillMatcher(path)
+
+    def find_skills(self, text=None, words=None):
+        """
+        Find every skill mentioned in a document in one linear pass. Names
+        of one skill that overlap, such as "google cloud platform" and its
+        synonym "google cloud", count as a single mention.
+        Args:
+            text (str): Document text.
+            words (list): Already-split word tokens, instead of text.
+        Returns:
+            dict: Canonical skill name to number of mentions.
+        """
+        if words is None:
+            words = DEFAULT_TOKENIZER.words(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        counts = {}
+        state = 0
+        last_end = {}
+        for position, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for skill_id, length in outputs[state]:
+                _count_match(counts, last_end, skill_id, position, length)
+        return {self.skills[skill_id]: count for skill_id, count in counts.items()}
+
+    def compare(self, resume_text, job_description, resume_words=None):
+        """
+        Compare the skills mentioned in a resume and a job description.
+        Args:
+            resume_words (list): Optional pre-split resume words, e.g. from
+                ResumeDocument.words(); skips re-tokenizing resume_text.
+        Returns:
+            dict: Matched and missing canonical skills and a skill score.
+        """
+        return compare_skills(self.find_skills(resume_text, resume_words),
+                              self.find_skills(job_description))
+
+
+class MappedSkillMatcher:
+    """
+    Read-only SkillMatcher over a memory-mapped file written by
+    SkillMatcher.save().
+
+    Loading maps the file and builds no Python objects per state or word,
+    so start-up cost does not grow with the taxonomy and forked workers
+    share one copy of the tables through the page cache instead of each
+    holding its own dicts.
+    Args:
+        path (str): Compiled automaton file.
+    Raises:
+        ValueError: The file is not a compiled automaton of this version.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._map_sections()
+        except (TypeError, struct.error) as e:
+            raise ValueError(f"Corrupt skill automaton: {e}") from e
+
+    def _map_sections(self):
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError("Truncated skill automaton")
+        (magic, version, little_endian, fingerprint, skill_count, word_count, state_count, word_slots,
+         edge_slots, output_count, skill_bytes, word_bytes) = _HEADER.unpack_from(self._mmap)
+        if magic != AUTOMATON_MAGIC or version != AUTOMATON_FORMAT_VERSION:
+            raise ValueError(f"Unsupported skill automaton format: {magic!r} v{version}")
+        if bool(little_endian) != (sys.byteorder == 'little'):
+            raise ValueError("Skill automaton was compiled on a machine with another byte order")
+
+        view = memoryview(self._mmap)
+        offset = _HEADER.size
+
+        def take(count):
+            nonlocal offset
+            section = view[offset:offset + count * 4].cast('I')
+            offset += count * 4
+            return section
+
+        self._word_offsets = take(word_count + 1)
+        self._word_table = take(word_slots)
+        self._edge_state = take(edge_slots)
+        self._edge_word = take(edge_slots)
+        self._edge_next = take(edge_slots)
+        self._fail = take(state_count)
+        self._output_offsets = take(state_count + 1)
+        self._output_ids = take(output_count)
+        self._output_lengths = take(output_count)
+        self._skill_offsets = take(skill_count + 1)
+        self._skill_start = offset
+        self._word_start = offset + skill_bytes
+        if self._word_start + word_bytes != len(self._mmap):
+            raise ValueError("Truncated skill automaton")
+        self._word_mask = word_slots - 1
+        self._edge_mask = edge_slots - 1
+        self.skill_count = skill_count
+        self.fingerprint = fingerprint
+
+    def skill_name(self, skill_id):
+        start, offsets = self._skill_start, self._skill_offsets
+        return self._mmap[start + offsets[skill_id]:start + offsets[skill_id + 1]].decode('utf-8')
+
+    def _word_id(self, word):
+        """
+        Returns:
+            int: Id of a word that occurs in some skill, or -1.
+        """
+        encoded = word.encode('utf-8')
+        table, offsets, start = self._word_table, self._word_offsets, self._word_start
+        slot = zlib.crc32(encoded) & self._word_mask
+        while table[slot]:
+            word_id = table[slot] - 1
+            if self._mmap[start + offsets[word_id]:start + offsets[word_id + 1]] == encoded:
+                return word_id
+            slot = (slot + 1) & self._word_mask
+        return -1
+
+    def _next_state(self, state, word_id):
+        """
+        Returns:
+            int: Target of the goto edge, or -1 if the state has none for the word.
+        """
+        edge_state, edge_word, mask = self._edge_state, self._edge_word, self._edge_mask
+        slot = _edge_hash(state, word_id, mask)
+        while edge_state[slot] != _EMPTY:
+            if edge_state[slot] == state and edge_word[slot] == word_id:
+                return self._edge_next[slot]
+            slot = (slot + 1) & mask
+        return -1
+
+    def find_skills(self, text=None, words=None):
+        """
+        Same as SkillMatcher.find_skills().
+        """
+        if words is None:
+            words = DEFAULT_TOKENIZER.words(text)
+        fail, output_offsets, output_ids = self._fail, self._output_offsets, self._output_ids
+        output_lengths = self._output_lengths
+        counts = {}
+        last_end = {}
+        state = 0
+        for position, word in enumerate(words):
+            word_id = self._word_id(word)
+            if word_id < 0:
+                # No skill contains the word, so no state has an edge for it
+                state = 0
+                continue
+            next_state = self._next_state(state, word_id)
+            while next_state < 0 and state:
+                state = fail[state]
+                next_state = self._next_state(state, word_id)
+            state = max(next_state, 0)
+            for i in range(output_offsets[state], output_offsets[state + 1]):
+                _count_match(counts, last_end, output_ids[i], position, output_lengths[i])
+        return {self.skill_name(skill_id): count for skill_id, count in counts.items()}
+
+    compare = SkillMatcher.compare
+
+    def close(self):
+        for name in ('_word_offsets', '_word_table', '_edge_state', '_edge_word', '_edge_next',
+                     '_fail', '_output_offsets', '_output_ids', '_output_lengths', '_skill_offsets'):
+            getattr(self, name).release()
+        self._mmap.close()
+
+
+def load_skill_matcher(automaton_path=None, taxonomy_path=DEFAULT_TAXONOMY_PATH):
+    """
+    Memory-map the compiled automaton if present and built from the current
+    taxonomy and protected terms, otherwise compile the taxonomy and write
+    the automaton for the next worker.
+    Args:
+        automaton_path (str): Optional compiled automaton location.
+        taxonomy_path (str): Taxonomy JSON used when compiling.
+    Returns:
+        MappedSkillMatcher: Ready-to-use matcher, or a SkillMatcher when
+            no automaton_path is given or it cannot be written.
+    """
+    if automaton_path and os.path.exists(automaton_path):
+        try:
+            matcher = SkillMatcher.load(automaton_path)
+            with open(taxonomy_path, 'rb') as f:
+                expected = source_fingerprint(f.read())
+            if matcher.fingerprint == expected:
+                return matcher
+            matcher.close()
+            logger.warning("Rebuilding skill automaton: the taxonomy or protected terms changed")
+        except (ValueError, OSError) as e:
+            logger.warning("Rebuilding skill automaton: %s", e)
+    matcher = SkillMatcher.from_taxonomy_file(taxonomy_path)
+    if automaton_path:
+        try:
+            matcher.save(automaton_path)
+        except OSError as e:
+            logger.warning("Could not write skill automaton, keeping it in memory: %s", e)
+            return matcher
+        return SkillMatcher.load(automaton_path)
+    return matcher
+
+
+if __name__ == '__main__':
+    # python -m utils.skill_matcher [taxonomy.json] skills.automaton
+    if len(sys.argv) not in (2, 3):
+        sys.exit("usage: python -m utils.skill_matcher [taxonomy.json] skills.automaton")
+    taxonomy = sys.argv[1] if len(sys.argv) == 3 else DEFAULT_TAXONOMY_PATH
+    SkillMatcher.from_taxonomy_file(taxonomy).save(sys.argv[-1])
+    print(f"Compiled {taxonomy} -> {sys.argv[-1]}")